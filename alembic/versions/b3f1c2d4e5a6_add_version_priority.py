@@ -0,0 +1,67 @@
+"""Add models.version_priority
+
+Revision ID: b3f1c2d4e5a6
+Revises: 5967ff94d7bc
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f1c2d4e5a6'
+down_revision: Union[str, None] = '5967ff94d7bc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Version rules as of this revision, copied here so the backfill does not
+# depend on application code that may change later
+_RE_FINAL_UPD_V = re.compile(r'finalUPDv\.(\d+)\.(\d+)')
+_RE_V = re.compile(r'v(\d+)(?:\.(\d+))?')
+
+
+def _version_priority(source_file: str) -> float:
+    if not source_file:
+        return 0
+
+    priority = 0.0
+    m = _RE_FINAL_UPD_V.search(source_file)
+    if m:
+        priority = 1000 + int(m.group(2))
+    elif 'finalUPD' in source_file:
+        priority = 1000
+    else:
+        m = _RE_V.search(source_file)
+        if m:
+            priority = int(m.group(1))
+    if '_new' in source_file:
+        priority += 0.5
+    return priority
+
+
+def upgrade() -> None:
+    op.add_column(
+        'models',
+        sa.Column('version_priority', sa.Float(), server_default='0', nullable=False),
+    )
+    op.create_index(
+        'idx_model_name_version', 'models', ['model_name', 'version_priority'], unique=False
+    )
+
+    # Backfill: one UPDATE per distinct source_file
+    conn = op.get_bind()
+    source_files = conn.execute(sa.text('SELECT DISTINCT source_file FROM models')).scalars().all()
+    for source_file in source_files:
+        conn.execute(
+            sa.text('UPDATE models SET version_priority = :priority WHERE source_file = :source_file'),
+            {'priority': _version_priority(source_file), 'source_file': source_file},
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_model_name_version', table_name='models')
+    op.drop_column('models', 'version_priority')
@@ -0,0 +1,34 @@
+"""Add trigram index on models.model_name
+
+Revision ID: c4d2e3f5a6b7
+Revises: b3f1c2d4e5a6
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d2e3f5a6b7'
+down_revision: Union[str, None] = 'b3f1c2d4e5a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # get_model_by_name searches with ILIKE '%name%', which a btree index
+    # cannot serve; a pg_trgm GIN index can
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'idx_model_name_trgm',
+        'models',
+        ['model_name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'model_name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_model_name_trgm', table_name='models')
@@ -18,14 +18,30 @@ class Settings(BaseSettings):
     openai_api_key: str = Field(..., alias="OPENAI_API_KEY")
     openai_model: str = Field("gpt-4o", alias="OPENAI_MODEL")
     openai_router_model: str = Field("gpt-4o-mini", alias="OPENAI_ROUTER_MODEL")
+    # Одновременных запросов к OpenAI на весь бот (остальные ждут очереди)
+    openai_max_concurrent_requests: int = Field(4, alias="OPENAI_MAX_CONCURRENT_REQUESTS")
+    # Повторы при 429/5xx/таймаутах (SDK ждёт по Retry-After, иначе экспоненциально)
+    openai_max_retries: int = Field(3, alias="OPENAI_MAX_RETRIES")
+    # Документы короче этого (в символах) идут сразу в Parser, без Router (0 — всегда Router)
+    router_skip_chars: int = Field(8000, alias="ROUTER_SKIP_CHARS")
+    # Время жизни кэша ответов Router/Parser по хэшу текста в секундах (0 — без кэша)
+    openai_cache_ttl: int = Field(3600, alias="OPENAI_CACHE_TTL")
 
     # Whitelist
     admin_ids: str = Field("", alias="ADMIN_IDS")
 
     # Matching settings
     match_threshold: int = Field(70, alias="MATCH_THRESHOLD")
+    # Нижняя граница совпадения для моделей в Excel-отчёте, в процентах
+    report_min_percentage: float = Field(80.0, alias="REPORT_MIN_PERCENTAGE")
     allow_lower_values: bool = Field(False, alias="ALLOW_LOWER_VALUES")
     deduplicate_models: bool = Field(True, alias="DEDUPLICATE_MODELS")
+    # Максимум частичных/неподходящих моделей на позицию в результатах (0 — все)
+    max_partial_results: int = Field(0, alias="MAX_PARTIAL_RESULTS")
+    # Время жизни кэша get_all_models() / get_models_by_categories() в секундах (0 — без кэша)
+    all_models_cache_ttl: int = Field(60, alias="ALL_MODELS_CACHE_TTL")
+    # Число процессов для оценки больших наборов кандидатов (0 — без пула процессов)
+    matcher_processes: int = Field(0, alias="MATCHER_PROCESSES")
 
     # Logging
     log_level: str = Field("INFO", alias="LOG_LEVEL")
@@ -1,9 +1,11 @@
-from typing import Any, Dict, List, Optional, Sequence
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy import case, func, select, text
+from sqlalchemy import Select, case, func, select, text
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import settings
 from database.db import async_session_maker
 from database.models import Model, SearchHistory, User
 from utils.logger import logger
@@ -43,22 +45,124 @@ async def create_user(
 # ──────────────────────────── Models ───────────────────────────
 
 
-async def get_all_models() -> Sequence[Model]:
+# Snapshots of the models table: (monotonic load time, rows).
+# get_all_models is keyed by `deduplicate`, get_models_by_categories by
+# (lowered categories, deduplicate). Both live for ALL_MODELS_CACHE_TTL
+# seconds and are reset by the write functions below.
+_ModelsCache = Dict[Any, Tuple[float, Sequence[Model]]]
+
+_all_models_cache: _ModelsCache = {}
+_category_models_cache: _ModelsCache = {}
+
+
+def invalidate_models_cache() -> None:
+    _all_models_cache.clear()
+    _category_models_cache.clear()
+
+
+def _get_cached(cache: _ModelsCache, key: Any) -> Optional[Sequence[Model]]:
+    ttl = settings.all_models_cache_ttl
+    cached = cache.get(key)
+    if ttl > 0 and cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    return None
+
+
+def _put_cached(cache: _ModelsCache, key: Any, models: Sequence[Model]) -> None:
+    if settings.all_models_cache_ttl > 0:
+        cache[key] = (time.monotonic(), models)
+
+
+def _latest_versions(query: Select) -> Select:
+    """One row per model_name: highest version_priority, then most specifications.
+
+    Same choice as services.matcher.deduplicate_models (empty specifications
+    are skipped), done by PostgreSQL with DISTINCT ON. Rows come ordered by
+    model_name.
+    """
+    specs_count = (
+        select(func.count())
+        .select_from(func.jsonb_object_keys(Model.specifications))
+        .scalar_subquery()
+    )
+    return (
+        query.where(Model.specifications != {})
+        .distinct(Model.model_name)
+        .order_by(
+            Model.model_name,
+            Model.version_priority.desc(),
+            specs_count.desc(),
+            Model.id,
+        )
+    )
+
+
+async def get_all_models(deduplicate: bool = False) -> Sequence[Model]:
+    """All models; cached for ALL_MODELS_CACHE_TTL seconds (0 disables).
+
+    With ``deduplicate=True`` only the latest version of each model is returned.
+    """
+    cached = _get_cached(_all_models_cache, deduplicate)
+    if cached is not None:
+        return cached
+
+    query = select(Model)
+    if deduplicate:
+        query = _latest_versions(query)
     async with async_session_maker() as session:
-        result = await session.execute(select(Model))
-        return result.scalars().all()
+        result = await session.execute(query)
+        models = result.scalars().all()
+
+    _put_cached(_all_models_cache, deduplicate, models)
+    return models
 
 
 async def get_models_by_category(category: str) -> Sequence[Model]:
-    async with async_session_maker() as session:
-        result = await session.execute(
-            select(Model).where(Model.category.ilike(category))
+    """Models of one category (case-insensitive); see get_models_by_categories."""
+    return await get_models_by_categories([category])
+
+
+async def get_models_by_categories(
+    categories: List[str], deduplicate: bool = False
+) -> Sequence[Model]:
+    """Models from several categories in one query (case-insensitive).
+
+    Rows are ordered by the position of their category in ``categories``.
+    With ``deduplicate=True`` only the latest version of each model is
+    returned, ordered by model_name. Cached like get_all_models.
+    """
+    if not categories:
+        return []
+    lowered = [c.lower() for c in categories]
+    cache_key = (tuple(lowered), deduplicate)
+    cached = _get_cached(_category_models_cache, cache_key)
+    if cached is not None:
+        return cached
+
+    category_lower = func.lower(Model.category)
+    query = select(Model).where(category_lower.in_(lowered))
+    if deduplicate:
+        query = _latest_versions(query)
+    else:
+        query = query.order_by(
+            case(
+                {c: i for i, c in reversed(list(enumerate(lowered)))},
+                value=category_lower,
+            )
         )
-        return result.scalars().all()
+    async with async_session_maker() as session:
+        result = await session.execute(query)
+        models = result.scalars().all()
+
+    _put_cached(_category_models_cache, cache_key, models)
+    return models
 
 
 async def get_model_by_name(model_name: str) -> Sequence[Model]:
-    """Search models by name. Exact matches come first, then substring matches."""
+    """Search models by name. Exact matches come first, then substring matches.
+
+    The substring ILIKE is served by the idx_model_name_trgm trigram index.
+    """
     async with async_session_maker() as session:
         result = await session.execute(
             select(Model)
@@ -104,6 +208,7 @@ async def bulk_create_models(models_data: List[Dict[str, Any]]) -> int:
     async with async_session_maker() as session:
         async with session.begin():
             session.add_all([Model(**data) for data in models_data])
+        invalidate_models_cache()
         logger.info(f"Bulk inserted {len(models_data)} models")
         return len(models_data)
 
@@ -114,6 +219,7 @@ async def delete_all_models() -> int:
         async with session.begin():
             result = await session.execute(text("DELETE FROM models"))
             count = result.rowcount
+        invalidate_models_cache()
         logger.info(f"Deleted {count} models")
         return count
 
@@ -4,6 +4,7 @@ from sqlalchemy import (
     BigInteger,
     Boolean,
     DateTime,
+    Float,
     Index,
     Integer,
     String,
@@ -38,6 +39,11 @@ class Model(Base):
     model_name: Mapped[str] = mapped_column(String(255), nullable=False)
     category: Mapped[str | None] = mapped_column(String(255), nullable=True)
     source_file: Mapped[str] = mapped_column(String(100), nullable=False)
+    # Priority of the source_file version (see services.normalization.parse_version_priority),
+    # filled in at import so the DB can pick the latest version of each model
+    version_priority: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0, server_default="0"
+    )
     specifications: Mapped[dict] = mapped_column(JSONB, nullable=False, default={})
     raw_specifications: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
@@ -49,6 +55,14 @@ class Model(Base):
 
     __table_args__ = (
         Index("idx_model_name", "model_name"),
+        Index("idx_model_name_version", "model_name", "version_priority"),
+        # Substring search by name (ILIKE '%...%'), requires pg_trgm
+        Index(
+            "idx_model_name_trgm",
+            "model_name",
+            postgresql_using="gin",
+            postgresql_ops={"model_name": "gin_trgm_ops"},
+        ),
         Index("idx_category", "category"),
         Index("idx_source_file", "source_file"),
         Index("idx_specifications_gin", "specifications", postgresql_using="gin"),
@@ -1,6 +1,8 @@
 """Handler for uploaded documents (DOCX, future PDF)."""
 
+import asyncio
 import os
+from functools import partial
 
 from aiogram import Bot, Router
 from aiogram.types import FSInputFile, Message
@@ -61,12 +63,17 @@ async def handle_document(message: Message, bot: Bot) -> None:
         logger.info(f"File downloaded to {file_path}")
         _start_time = _time.time()
 
+        # DOCX parsing and the Excel report are synchronous and CPU-bound:
+        # run them in the default thread pool so other users' updates are
+        # not stalled while one document is processed
+        loop = asyncio.get_running_loop()
+
         # HYBRID APPROACH: Try table parser first, then AI fallback
         await status_msg.edit_text("Анализирую структуру документа...")
 
         # Strategy 1: Direct table parsing (fast, reliable for structured docs)
         logger.info("Attempting table-based parsing...")
-        requirements = parse_requirements_from_tables(file_path)
+        requirements = await loop.run_in_executor(None, parse_requirements_from_tables, file_path)
 
         if requirements:
             items = requirements.get("items", [])
@@ -79,7 +86,7 @@ async def handle_document(message: Message, bot: Bot) -> None:
             # Strategy 2: AI-based parsing (flexible for unstructured docs)
             logger.info("Table parser returned None, falling back to AI...")
             await status_msg.edit_text("Извлекаю текст из документа...")
-            text = extract_text_from_docx(file_path)
+            text = await loop.run_in_executor(None, extract_text_from_docx, file_path)
 
             if not text.strip():
                 await status_msg.edit_text("Документ пуст или не содержит текста.")
@@ -162,15 +169,16 @@ async def handle_document(message: Message, bot: Bot) -> None:
             "Этап 3/3: Генерация Excel отчета..."
         )
 
-        excel_path = generate_report(
+        excel_path = await loop.run_in_executor(None, partial(
+            generate_report,
             requirements=requirements,
             match_results=match_results,
             output_dir=TEMP_DIR,
             threshold=settings.match_threshold,
-            min_percentage=80.0,
+            min_percentage=settings.report_min_percentage,
             filename=file_name,
             processing_time=_time.time() - _start_time,
-        )
+        ))
 
         # Save search history (non-critical — don't break main flow)
         try:
@@ -136,10 +136,11 @@ async def check_openai():
         print(f"  ✗ Ошибка: {e}")
 
     # Проверка canonical keys
-    from services.openai_service import _CANONICAL_KEYS
-    print(f"\\nКаноническ ключей загружено: {len(_CANONICAL_KEYS)}")
-    if _CANONICAL_KEYS:
-        print(f"  Примеры: {', '.join(_CANONICAL_KEYS[:10])}...")
+    from services.normalization import get_canonical_keys
+    canonical_keys = get_canonical_keys()
+    print(f"\\nКаноническ ключей загружено: {len(canonical_keys)}")
+    if canonical_keys:
+        print(f"  Примеры: {', '.join(canonical_keys[:10])}...")
 
     print("\\n✓ OpenAI API настроен корректно")
 
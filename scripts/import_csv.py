@@ -22,6 +22,7 @@ import pandas as pd
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 
+from services.normalization import parse_version_priority
 from utils.logger import logger
 
 CSV_DIR = os.path.join(PROJECT_ROOT, "data", "csv")
@@ -231,6 +232,7 @@ def parse_csv_file(
         return []
 
     source_file = extract_source_from_filename(filename)
+    version_priority = parse_version_priority(source_file)
     models: List[Dict[str, Any]] = []
 
     for _, row in df.iterrows():
@@ -265,6 +267,7 @@ def parse_csv_file(
             "model_name": model_name,
             "category": category,
             "source_file": source_file,
+            "version_priority": version_priority,
             "specifications": specifications,
             "raw_specifications": raw_specifications,
         })
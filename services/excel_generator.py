@@ -8,10 +8,12 @@
 - Лист "Не сопоставленные"— позиции без подходящих моделей
 """
 
+import heapq
 import json
 import os
 import re
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -226,7 +228,8 @@ def _create_summary_sheet(
                     if name not in top_models or m["match_percentage"] > top_models[name]["match_percentage"]:
                         top_models[name] = {**m, "_total_specs": total_specs}
 
-    sorted_top = sorted(top_models.values(), key=lambda x: x["match_percentage"], reverse=True)[:10]
+    # nlargest == sorted(..., reverse=True)[:10], без сортировки всего списка
+    sorted_top = heapq.nlargest(10, top_models.values(), key=itemgetter("match_percentage"))
 
     for i, m in enumerate(sorted_top, 1):
         pct = m["match_percentage"]
@@ -10,14 +10,24 @@
 - deduplicate_models: дедупликация моделей (выбор лучшей версии из дублей)
 """
 
+import asyncio
+import heapq
+import logging
 import re
+import sys
 import time
-from collections import defaultdict
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain
+from operator import itemgetter
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from config import settings
-from database.crud import get_model_by_name, get_models_by_category, get_all_models
+from database.crud import get_model_by_name, get_models_by_categories, get_all_models
 from database.models import Model
+from services.normalization import parse_version_priority
 from utils.logger import logger
 
 
@@ -26,6 +36,22 @@ from utils.logger import logger
 # ════════════════════════════════════════════════════════════════════════════
 
 
+# Регулярные выражения компилируются один раз: extract_number вызывается
+# для каждой пары (кандидат, характеристика).
+# (?<!\d) не даёт начинать поиск с середины серии цифр — без него длинные
+# цифровые строки (серийные номера) разбираются за квадратичное время
+_RE_LEADING_OPERATOR = re.compile(r'^[≥≤><≠=]+\s*')
+_RE_RANGE = re.compile(r'(?<!\d)(\d+(?:\.\d+)?)\s*(?:-|до)\s*(\d+(?:\.\d+)?)')
+_RE_MULT = re.compile(r'(?<!\d)(\d+)\s*(?:x|×|блок\w*\s+по)\s*(\d+)', re.IGNORECASE)
+_RE_PREFIX = re.compile(r'(?:до|не\s+менее|минимум|максимум)\s+(\d+(?:\.\d+)?)', re.IGNORECASE)
+# В каждой альтернативе цифры разбираются однозначно (в \d*\.?\d+ серию
+# цифр можно поделить между \d* и \d+ любым способом) — без перебора разбиений
+_RE_NUMBER = re.compile(r"[-+]?(?:\d+\.\d+|\d+\.?|\.\d+)")
+
+# Символы «голого» числа: такие строки сначала пробуем разобрать через float()
+_PLAIN_NUMBER_CHARS = "0123456789.+-"
+
+
 def extract_number(val) -> Optional[float]:
     """
     Извлечение числового значения из различных форматов.
@@ -40,6 +66,12 @@ def extract_number(val) -> Optional[float]:
     - Префиксы: "до 1000" → 1000, "не менее 500" → 500
     - Операторы: "≥24" → 24, "<=100" → 100 (оператор игнорируется)
     """
+    # Точные типы (самый частый случай) — одним поиском в словаре
+    extractor = _NUMBER_EXTRACTORS.get(type(val))
+    if extractor is not None:
+        return extractor(val)
+
+    # Подклассы и прочие типы
     if isinstance(val, bool):
         return None
 
@@ -49,37 +81,90 @@ def extract_number(val) -> Optional[float]:
     if not isinstance(val, str):
         return None
 
+    return _extract_number_from_str(val)
+
+
+@lru_cache(maxsize=8192)
+def _extract_number_from_str(val: str) -> Optional[float]:
+    """
+    Строковая часть extract_number.
+
+    Кэшируется: у моделей много одинаковых значений ("24", "48 портов"),
+    а одно и то же значение сравнивается с каждым требованием.
+    """
     # Убираем операторы сравнения перед извлечением числа
-    val_clean = re.sub(r'^[≥≤><≠=]+\s*', '', val.strip())
+    val_clean = _RE_LEADING_OPERATOR.sub('', val.strip())
 
     # Замена запятых на точки для дробных чисел
     val_normalized = val_clean.replace(',', '.')
 
+    # Быстрый путь: строка — просто число ("24", "2.5", "-40").
+    # Проверка набора символов отсекает "inf", "nan", "1e5", "1_000",
+    # которые float() принял бы, а регулярные выражения — нет
+    if val_normalized and not val_normalized.strip(_PLAIN_NUMBER_CHARS):
+        try:
+            return float(val_normalized)
+        except ValueError:
+            pass
+
+    # Сложные шаблоны запускаются, только если в строке есть их маркеры
+    val_lower = val_normalized.lower()
+
     # Диапазоны: "10-20", "от 100 до 200"
     # Берем максимальное значение (наиболее строгое требование)
-    range_match = re.search(r'(\d+(?:\.\d+)?)\s*(?:-|до)\s*(\d+(?:\.\d+)?)', val_normalized)
-    if range_match:
-        return max(float(range_match.group(1)), float(range_match.group(2)))
+    if '-' in val_lower or 'до' in val_lower:
+        range_match = _RE_RANGE.search(val_normalized)
+        if range_match:
+            return max(float(range_match.group(1)), float(range_match.group(2)))
 
     # Умножение: "2x4", "4 блока по 8 портов"
-    mult_match = re.search(r'(\d+)\s*(?:x|×|блок\w*\s+по)\s*(\d+)', val_normalized, re.IGNORECASE)
-    if mult_match:
-        return float(mult_match.group(1)) * float(mult_match.group(2))
+    if 'x' in val_lower or '×' in val_lower or 'по' in val_lower:
+        mult_match = _RE_MULT.search(val_normalized)
+        if mult_match:
+            return float(mult_match.group(1)) * float(mult_match.group(2))
 
     # Префиксы: "до 1000", "не менее 500", "минимум 100"
-    prefix_match = re.search(r'(?:до|не\s+менее|минимум|максимум)\s+(\d+(?:\.\d+)?)', val_normalized, re.IGNORECASE)
-    if prefix_match:
-        return float(prefix_match.group(1))
+    if any(marker in val_lower for marker in ('до', 'менее', 'минимум', 'максимум')):
+        prefix_match = _RE_PREFIX.search(val_normalized)
+        if prefix_match:
+            return float(prefix_match.group(1))
 
     # Простое число (целое или дробное) в строке
     # Ищем первое число, включая отрицательные
-    match = re.search(r"[-+]?\d*\.?\d+", val_normalized)
+    match = _RE_NUMBER.search(val_normalized)
     if match:
         return float(match.group())
 
     return None
 
 
+# bool не входит в таблицу: type(True) is bool, а не int — такие значения
+# уходят в общую ветку и дают None
+_NUMBER_EXTRACTORS: Dict[type, Callable[[Any], Optional[float]]] = {
+    int: float,
+    float: float,
+    str: _extract_number_from_str,
+}
+
+
+# Операторы в начале строки ТЗ: одна альтернатива (двухсимвольные раньше
+# односимвольных), каноническая запись — по словарю
+_RE_OPERATOR = re.compile(r'>=|<=|!=|[≥≤≠><=]')
+_OPERATORS = {
+    ">=": ">=", "≥": ">=",
+    "<=": "<=", "≤": "<=",
+    "!=": "!=", "≠": "!=",
+    ">": ">", "<": "<", "=": "=",
+}
+
+# Текстовые префиксы — имеют приоритет над символьными операторами.
+# Номер группы задаёт приоритет при нескольких совпадениях в строке
+_RE_TEXT_OPERATOR = re.compile(
+    r'(не\s+менее)|(не\s+более)|(минимум)|(максимум)|(^до\s+)', re.IGNORECASE
+)
+_TEXT_OPERATORS = (None, ">=", "<=", ">=", "<=", "<=")
+
+
 def extract_number_with_operator(val) -> Tuple[Optional[float], str]:
     """
     Извлечение числового значения и оператора сравнения из значения ТЗ.
@@ -109,40 +194,28 @@ def extract_number_with_operator(val) -> Tuple[Optional[float], str]:
     if not isinstance(val, str):
         return (None, default_op)
 
+    return _extract_number_with_operator_from_str(val)
+
+
+@lru_cache(maxsize=4096)
+def _extract_number_with_operator_from_str(val: str) -> Tuple[Optional[float], str]:
+    """
+    Строковая часть extract_number_with_operator.
+
+    Кэшируется: одни и те же требования ("≥ 24", "не менее 8") повторяются
+    в разных позициях ТЗ и в повторных запросах.
+    """
+    default_op = ">="
     val_stripped = val.strip()
 
     # Определяем оператор из начала строки
-    op = default_op
-    operator_patterns = [
-        (r'^>=\s*', ">="),
-        (r'^≥\s*', ">="),
-        (r'^<=\s*', "<="),
-        (r'^≤\s*', "<="),
-        (r'^!=\s*', "!="),
-        (r'^≠\s*', "!="),
-        (r'^>\s*', ">"),
-        (r'^<\s*', "<"),
-        (r'^=\s*', "="),
-    ]
-
-    for pattern, operator in operator_patterns:
-        if re.match(pattern, val_stripped):
-            op = operator
-            break
+    op_match = _RE_OPERATOR.match(val_stripped)
+    op = _OPERATORS[op_match.group()] if op_match else default_op
 
     # Текстовые префиксы
-    text_prefix_patterns = [
-        (r'не\s+менее', ">="),
-        (r'не\s+более', "<="),
-        (r'минимум', ">="),
-        (r'максимум', "<="),
-        (r'^до\s+', "<="),
-    ]
-
-    for pattern, operator in text_prefix_patterns:
-        if re.search(pattern, val_stripped, re.IGNORECASE):
-            op = operator
-            break
+    text_groups = [m.lastindex for m in _RE_TEXT_OPERATOR.finditer(val_stripped)]
+    if text_groups:
+        op = _TEXT_OPERATORS[min(text_groups)]
 
     # Извлекаем число
     number = extract_number(val)
@@ -160,6 +233,26 @@ _YES_SYNONYMS = {'да', 'yes', 'есть', 'имеется', 'поддержи
 _NO_SYNONYMS = {'нет', 'no', 'отсутствует', 'не поддерживается', 'false', '0'}
 
 
+# Разделители слов помимо пробельных: заменяются пробелом, дальше str.split()
+_WORD_SEPARATORS = str.maketrans(',;/', '   ')
+
+
+@lru_cache(maxsize=8192)
+def _normalize_text(value: str) -> Tuple[str, FrozenSet[str], FrozenSet[str]]:
+    """
+    Нормализация строки для compare_text_values: (текст, слова, части через запятую).
+
+    Кэшируется — одни и те же строки моделей сравниваются с каждым требованием.
+    Слова и части интернируются: одинаковые токены разных записей кэша
+    хранятся одним объектом, а сравнение при пересечении множеств
+    заканчивается на проверке идентичности.
+    """
+    text = value.strip().lower()
+    words = frozenset(map(sys.intern, text.translate(_WORD_SEPARATORS).split()))
+    parts = frozenset(sys.intern(p.strip()) for p in text.split(','))
+    return text, words, parts
+
+
 def compare_text_values(required: str, model: str) -> bool:
     """
     Многоуровневое текстовое сравнение.
@@ -177,8 +270,16 @@ def compare_text_values(required: str, model: str) -> bool:
     Returns:
         True если значения совместимы
     """
-    req = required.strip().lower()
-    mod = model.strip().lower()
+    return _compare_normalized_text(_normalize_text(required), _normalize_text(model))
+
+
+def _compare_normalized_text(
+    required: Tuple[str, FrozenSet[str], FrozenSet[str]],
+    model: Tuple[str, FrozenSet[str], FrozenSet[str]],
+) -> bool:
+    """compare_text_values для уже нормализованных значений (см. _normalize_text)."""
+    req, req_words, req_parts = required
+    mod, mod_words, mod_parts = model
 
     # 1. Точное совпадение
     if req == mod:
@@ -194,15 +295,11 @@ def compare_text_values(required: str, model: str) -> bool:
     # чтобы избежать "управляемый" ⊂ "неуправляемый".
     # Правильное направление: req_words <= mod_words (модель содержит всё требуемое).
     # Обратное (mod <= req) не допускается: "управляемый" не соответствует "управляемый L3 plus".
-    req_words = set(re.split(r'[\s,;/]+', req)) - {''}
-    mod_words = set(re.split(r'[\s,;/]+', mod)) - {''}
     if req_words and mod_words:
         if req_words <= mod_words:
             return True
 
     # 4. Пересечение comma-separated списков
-    req_parts = {p.strip() for p in req.split(',')}
-    mod_parts = {p.strip() for p in mod.split(',')}
     if len(req_parts) > 1 or len(mod_parts) > 1:
         if req_parts & mod_parts:
             return True
@@ -218,7 +315,6 @@ def compare_text_values(required: str, model: str) -> bool:
 def compare_spec_values(
     required_value: Any,
     model_value: Any,
-    key: str,
     allow_lower: bool = False,
 ) -> bool:
     """
@@ -227,7 +323,6 @@ def compare_spec_values(
     Args:
         required_value: Требуемое значение из ТЗ (может содержать оператор: "≤100")
         model_value: Значение из модели
-        key: Ключ характеристики (для логирования)
         allow_lower: Допускать ли значения ниже требуемых (для числовых характеристик)
 
     Returns:
@@ -244,29 +339,130 @@ def compare_spec_values(
     if model_value is None:
         return False
 
-    # Boolean характеристики (поддержка протоколов, функций)
-    if isinstance(required_value, bool):
-        return bool(model_value) == required_value
+    return _make_comparator(required_value, allow_lower)(model_value)
+
+
+def _make_comparator(required_value: Any, allow_lower: bool) -> Callable[[Any], bool]:
+    """
+    Построение функции сравнения для одного требуемого значения.
+
+    Разбор required_value (тип, число, оператор) выполняется один раз —
+    возвращаемая функция принимает только значение модели (не None) и
+    повторяет правила compare_spec_values. Построитель выбирается по
+    точному типу значения (см. _COMPARATOR_FACTORIES).
+    """
+    factory = _COMPARATOR_FACTORIES.get(type(required_value), _generic_comparator)
+    return factory(required_value, allow_lower)
+
+
+def _bool_comparator(required_value: bool, allow_lower: bool) -> Callable[[Any], bool]:
+    """Boolean характеристики (поддержка протоколов, функций)."""
+    return lambda model_value: bool(model_value) == required_value
 
-    # Извлекаем число и оператор из required_value
+
+def _number_comparator(required_value: Any, allow_lower: bool) -> Callable[[Any], bool]:
+    """Число в ТЗ: оператор по умолчанию ">=" (модель должна быть не хуже)."""
+    return _numeric_comparator(required_value, float(required_value), ">=", allow_lower)
+
+
+def _str_comparator(required_value: str, allow_lower: bool) -> Callable[[Any], bool]:
+    """Строка в ТЗ: числовое требование с оператором ("≥24") или текст."""
     req_num, op = extract_number_with_operator(required_value)
-    model_num = extract_number(model_value)
-
-    # Если оба значения числовые - выполняем числовое сравнение с учётом оператора
-    if req_num is not None and model_num is not None:
-        result = _apply_operator(req_num, model_num, op, allow_lower)
-        logger.debug(
-            f"Numeric comparison for '{key}': required={req_num}, model={model_num}, "
-            f"op='{op}', allow_lower={allow_lower}, result={result}"
-        )
-        return result
+    # Требуемая строка нормализуется один раз, строки моделей — через кэш
+    req_text = _normalize_text(required_value)
+
+    if req_num is not None:
+        return _numeric_comparator(required_value, req_num, op, allow_lower, req_text)
 
     # Строковые характеристики — многоуровневое сравнение
-    if isinstance(required_value, str) and isinstance(model_value, str):
-        return compare_text_values(required_value, model_value)
+    return lambda model_value: (
+        model_value == required_value
+        or (
+            isinstance(model_value, str)
+            and _compare_normalized_text(req_text, _normalize_text(model_value))
+        )
+    )
+
+
+def _generic_comparator(required_value: Any, allow_lower: bool) -> Callable[[Any], bool]:
+    """Подклассы bool/int/float/str и прочие типы."""
+    if isinstance(required_value, bool):
+        return _bool_comparator(required_value, allow_lower)
+    if isinstance(required_value, (int, float)):
+        return _number_comparator(required_value, allow_lower)
+    if isinstance(required_value, str):
+        return _str_comparator(required_value, allow_lower)
 
     # Для всех остальных типов - строгое равенство
-    return required_value == model_value
+    return lambda model_value: required_value == model_value
+
+
+def _numeric_comparator(
+    required_value: Any,
+    req_num: float,
+    op: str,
+    allow_lower: bool,
+    req_text: Optional[Tuple[str, FrozenSet[str], FrozenSet[str]]] = None,
+) -> Callable[[Any], bool]:
+    """
+    Числовое требование: если значение модели тоже числовое — сравнение
+    с учётом оператора, иначе текстовое сравнение (для строк) или равенство.
+    """
+    # Значение модели, равное требуемому, заведомо проходит нестрогие
+    # операторы — без разбора строки. Для отрицательных чисел с allow_lower
+    # это не так (-40 < -40 * 0.95), там сравнение всегда полное
+    equal_matches = op in (">=", "<=", "=") and not (allow_lower and req_num < 0)
+    # Уровень логирования проверяется один раз на требование, а не на
+    # каждое сравнение (их — кандидаты × характеристики)
+    log_comparisons = logger.isEnabledFor(logging.DEBUG)
+
+    def compare_numeric(model_value: Any) -> bool:
+        if equal_matches and model_value == required_value:
+            return True
+        # Числа из JSONB (int/float) сравниваются напрямую, без extract_number
+        model_type = type(model_value)
+        if model_type is int or model_type is float:
+            model_num = float(model_value)
+        else:
+            model_num = extract_number(model_value)
+        if model_num is not None:
+            result = _apply_operator(req_num, model_num, op, allow_lower)
+            if log_comparisons:
+                logger.debug(
+                    "Numeric comparison: required=%s, model=%s, op='%s', allow_lower=%s, result=%s",
+                    req_num, model_num, op, allow_lower, result,
+                )
+            return result
+        if req_text is not None and isinstance(model_value, str):
+            return _compare_normalized_text(req_text, _normalize_text(model_value))
+        return required_value == model_value
+
+    return compare_numeric
+
+
+# bool проверяется по точному типу раньше int: type(True) is bool
+_COMPARATOR_FACTORIES: Dict[type, Callable[[Any, bool], Callable[[Any], bool]]] = {
+    bool: _bool_comparator,
+    int: _number_comparator,
+    float: _number_comparator,
+    str: _str_comparator,
+}
+
+
+def _compile_required_specs(
+    required_specs: Dict[str, Any],
+    allow_lower: bool = False,
+) -> List[Tuple[str, Any, Callable[[Any], bool]]]:
+    """
+    Подготовка требований к сравнению со множеством моделей.
+
+    Returns:
+        Список (key, required_value, comparator) в порядке required_specs
+    """
+    return [
+        (key, required_value, _make_comparator(required_value, allow_lower))
+        for key, required_value in required_specs.items()
+    ]
 
 
 def _apply_operator(req_num: float, model_num: float, op: str, allow_lower: bool) -> bool:
@@ -309,6 +505,7 @@ def calculate_match_percentage(
     required_specs: Dict[str, Any],
     model_specs: Dict[str, Any],
     allow_lower: bool = False,
+    compiled: Optional[List[Tuple[str, Any, Callable[[Any], bool]]]] = None,
 ) -> Dict[str, Any]:
     """
     Вычисление процента совпадения характеристик модели с требованиями.
@@ -317,6 +514,8 @@ def calculate_match_percentage(
         required_specs: Требуемые характеристики из ТЗ
         model_specs: Характеристики модели из БД
         allow_lower: Допускать ли значения ниже требуемых
+        compiled: Результат _compile_required_specs(required_specs, allow_lower),
+            если требования сравниваются с несколькими моделями
 
     Returns:
         Dict с ключами:
@@ -336,13 +535,28 @@ def calculate_match_percentage(
             "different_specs": {},
         }
 
+    # Ни одной требуемой характеристики в модели — проверка пересечения
+    # ключей выполняется на уровне C, без обхода требований
+    if model_specs.keys().isdisjoint(required_specs):
+        unmapped_specs = list(required_specs)
+        return {
+            "match_percentage": 0.0,
+            "matched_specs": [],
+            "unmapped_specs": unmapped_specs,
+            "missing_specs": unmapped_specs,
+            "different_specs": {},
+        }
+
+    if compiled is None:
+        compiled = _compile_required_specs(required_specs, allow_lower)
+
     total_specs = len(required_specs)
     matched_count = 0
     matched_specs = []
     unmapped_specs = []
     different_specs = {}
 
-    for key, required_value in required_specs.items():
+    for key, required_value, comparator in compiled:
         model_value = model_specs.get(key)
 
         # Характеристика отсутствует в модели (unmapped — проблема данных/маппинга)
@@ -351,7 +565,7 @@ def calculate_match_percentage(
             continue
 
         # Сравнение значений
-        if compare_spec_values(required_value, model_value, key, allow_lower):
+        if comparator(model_value):
             matched_count += 1
             matched_specs.append(key)
         else:
@@ -368,13 +582,102 @@ def calculate_match_percentage(
     }
 
 
+def _count_matches(
+    compiled: Sequence[Tuple[str, Any, Callable[[Any], bool]]],
+    model_specs: Dict[str, Any],
+) -> int:
+    """Количество совпавших характеристик (отсутствующие в модели не считаются)."""
+    matched_count = 0
+    for key, _, comparator in compiled:
+        model_value = model_specs.get(key)
+        if model_value is not None and comparator(model_value):
+            matched_count += 1
+    return matched_count
+
+
+# Начиная с этого размера (кандидаты × числовые характеристики) числовые
+# сравнения выполняются пакетно через NumPy, а не поэлементно в Python
+NUMPY_BATCH_MIN_CELLS = 5000
+
+
+def _numeric_match_matrix(
+    required_specs: Dict[str, Any],
+    candidate_specs: Sequence[Dict[str, Any]],
+    allow_lower: bool = False,
+) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Пакетное сравнение числовых характеристик всех кандидатов через NumPy.
+
+    Значения моделей (candidate_specs — их specifications) один раз собираются
+    в матрицу (модели × ключи), после чего оператор каждого требования
+    применяется ко всему столбцу сразу.
+
+    Returns:
+        Tuple (numeric_keys, matched, resolved, needs_python):
+        - numeric_keys: ключи с числовым требованием (порядок столбцов)
+        - matched: bool-матрица совпадений
+        - resolved: bool-матрица ячеек, где значение модели числовое
+        - needs_python: ячейки с нечисловым значением модели (текст и т.п.) —
+          только их нужно сравнивать в Python; отсутствующие значения
+          (None) не совпадают и проверки не требуют
+    """
+    numeric_keys: List[str] = []
+    numeric_reqs: List[Tuple[float, str]] = []
+    for key, required_value in required_specs.items():
+        if isinstance(required_value, bool):
+            continue
+        req_num, op = extract_number_with_operator(required_value)
+        if req_num is not None:
+            numeric_keys.append(key)
+            numeric_reqs.append((req_num, op))
+
+    model_mat = np.full((len(candidate_specs), len(numeric_keys)), np.nan)
+    needs_python = np.zeros(model_mat.shape, dtype=bool)
+    for i, specs in enumerate(candidate_specs):
+        specs = specs or {}
+        for j, key in enumerate(numeric_keys):
+            value = specs.get(key)
+            if value is None:
+                continue
+            model_num = extract_number(value)
+            if model_num is not None:
+                model_mat[i, j] = model_num
+            else:
+                needs_python[i, j] = True
+
+    resolved = ~np.isnan(model_mat)
+    matched = np.zeros(model_mat.shape, dtype=bool)
+    for j, (req_num, op) in enumerate(numeric_reqs):
+        # _apply_operator работает поэлементно и для массивов NumPy
+        matched[:, j] = _apply_operator(req_num, model_mat[:, j], op, allow_lower)
+
+    return numeric_keys, matched & resolved, resolved, needs_python
+
+
 # ════════════════════════════════════════════════════════════════════════════
 # Категоризация результатов
 # ════════════════════════════════════════════════════════════════════════════
 
 
+_BY_PERCENTAGE = itemgetter("match_percentage")
+_MATCH_BY_MODEL_NAME = itemgetter("model_name")
+
+
+def _top_by_percentage(bucket: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """
+    Сортировка по убыванию процента совпадения с отсечением до limit записей.
+
+    При limit меньше размера списка используется heapq.nlargest —
+    O(n log K) вместо полной сортировки; порядок равных сохраняется.
+    """
+    if 0 < limit < len(bucket):
+        return heapq.nlargest(limit, bucket, key=_BY_PERCENTAGE)
+    bucket.sort(key=_BY_PERCENTAGE, reverse=True)
+    return bucket
+
+
 def categorize_matches(
-    matches: List[Dict[str, Any]], threshold: int = 70
+    matches: List[Dict[str, Any]], threshold: int = 70, limit: int = 0
 ) -> Dict[str, List[Dict[str, Any]]]:
     """
     Группировка результатов сопоставления по категориям.
@@ -382,6 +685,7 @@ def categorize_matches(
     Args:
         matches: Список результатов с процентами совпадения
         threshold: Порог для частичного совпадения (по умолчанию 70%)
+        limit: Максимум записей в partial и not_matched (0 — без ограничения)
 
     Returns:
         Dict с категориями:
@@ -402,16 +706,20 @@ def categorize_matches(
         else:
             not_matched.append(match)
 
-    # Сортировка по убыванию процента совпадения
-    ideal.sort(key=lambda x: x["model_name"])
-    partial.sort(key=lambda x: x["match_percentage"], reverse=True)
-    not_matched.sort(key=lambda x: x["match_percentage"], reverse=True)
+    # Сортировка: ideal — по названию, остальные — по убыванию процента
+    if len(ideal) > 1:
+        ideal.sort(key=_MATCH_BY_MODEL_NAME)
 
     logger.info(
-        f"Categorized: {len(ideal)} ideal, {len(partial)} partial, {len(not_matched)} not matched"
+        "Categorized: %d ideal, %d partial, %d not matched",
+        len(ideal), len(partial), len(not_matched),
     )
 
-    return {"ideal": ideal, "partial": partial, "not_matched": not_matched}
+    return {
+        "ideal": ideal,
+        "partial": _top_by_percentage(partial, limit),
+        "not_matched": _top_by_percentage(not_matched, limit),
+    }
 
 
 # ════════════════════════════════════════════════════════════════════════════
@@ -419,40 +727,9 @@ def categorize_matches(
 # ════════════════════════════════════════════════════════════════════════════
 
 
-def _parse_version_priority(source_file: str) -> float:
-    """
-    Извлечение приоритета версии из имени source_file.
-
-    Правила:
-    - 'finalUPDv.X.Y' → 1000 + Y (напр. finalUPDv.1.2 → 1002)
-    - 'finalUPD' (без версии) → 1000
-    - 'vNN' → NN (напр. v21 → 21, v33 → 33)
-    - 'vNN.M' → NN (дробная часть .M игнорируется для основного приоритета)
-    - суффикс '_new' → +0.5
-    - без версии → 0
-    """
-    if not source_file:
-        return 0
-
-    priority = 0.0
-
-    # finalUPDv.X.Y — высший приоритет
-    m = re.search(r'finalUPDv\.(\d+)\.(\d+)', source_file)
-    if m:
-        priority = 1000 + int(m.group(2))
-    elif 'finalUPD' in source_file:
-        priority = 1000
-    else:
-        # vNN или vNN.M
-        m = re.search(r'v(\d+)(?:\.(\d+))?', source_file)
-        if m:
-            priority = int(m.group(1))
-
-    # _new суффикс даёт бонус +0.5
-    if '_new' in source_file:
-        priority += 0.5
-
-    return priority
+def _version_key(model: Model) -> Tuple[float, int]:
+    """Ключ выбора лучшей версии среди дублей (specifications уже непустые)."""
+    return parse_version_priority(model.source_file or ""), len(model.specifications)
 
 
 def deduplicate_models(models: Sequence[Model]) -> List[Model]:
@@ -460,8 +737,8 @@ def deduplicate_models(models: Sequence[Model]) -> List[Model]:
     Дедупликация списка моделей: для каждого model_name оставляет лучшую версию.
 
     Критерии выбора лучшей версии (по приоритету):
-    1. Количество непустых specifications (больше = лучше)
-    2. Версия из source_file (finalUPD > v21 > v20 > без версии)
+    1. Версия из source_file (finalUPD > v21 > v20 > без версии)
+    2. Количество непустых specifications (больше = лучше)
 
     Также фильтрует модели с пустыми specifications ({}).
     """
@@ -469,32 +746,34 @@ def deduplicate_models(models: Sequence[Model]) -> List[Model]:
     non_empty = [m for m in models if m.specifications]
     filtered_count = len(models) - len(non_empty)
     if filtered_count:
-        logger.info(f"Filtered out {filtered_count} models with empty specifications")
-
-    # Группировка по model_name
-    groups: Dict[str, List[Model]] = defaultdict(list)
+        logger.info("Filtered out %d models with empty specifications", filtered_count)
+
+    # Один проход со словарём «лучшая версия по имени»: для уникальных
+    # моделей (самый частый случай) ключ версии даже не вычисляется —
+    # он нужен только при встрече дубля. При равных ключах остаётся
+    # модель, встреченная первой; порядок результата — порядок первых вхождений
+    best: Dict[str, Model] = {}
+    best_keys: Dict[str, Tuple[float, int]] = {}
     for model in non_empty:
-        groups[model.model_name].append(model)
+        name = model.model_name
+        current = best.get(name)
+        if current is None:
+            best[name] = model
+            continue
 
-    # Выбор лучшей версии из каждой группы
-    result = []
-    for name, group in groups.items():
-        if len(group) == 1:
-            result.append(group[0])
-        else:
-            # Сортировка: сначала по кол-ву specs (desc), потом по версии (desc)
-            best = max(
-                group,
-                key=lambda m: (
-                    _parse_version_priority(m.source_file or ""),
-                    len(m.specifications) if m.specifications else 0,
-                ),
-            )
-            result.append(best)
+        current_key = best_keys.get(name)
+        if current_key is None:
+            current_key = best_keys[name] = _version_key(current)
+        key = _version_key(model)
+        if key > current_key:
+            best[name] = model
+            best_keys[name] = key
+
+    result = list(best.values())
 
     logger.info(
-        f"Deduplicated: {len(models)} → {len(result)} models "
-        f"({len(models) - len(result)} duplicates removed)"
+        "Deduplicated: %d → %d models (%d duplicates removed)",
+        len(models), len(result), len(models) - len(result),
     )
 
     return result
@@ -505,6 +784,293 @@ def deduplicate_models(models: Sequence[Model]) -> List[Model]:
 # ════════════════════════════════════════════════════════════════════════════
 
 
+# Mapping категорий к подкатегориям для расширенного поиска
+CATEGORY_SUBCATEGORIES = {
+    "Коммутаторы": ["Управляемый", "Неуправляемый", "Промышленный"],
+    "Маршрутизаторы": ["Универсальный шлюз безопасности", "Модульный"],
+    # Добавить другие категории по мере необходимости
+}
+
+
+async def _search_candidates(
+    model_name: Optional[str],
+    category: Optional[str],
+    deduplicate: bool = False,
+) -> List[Model]:
+    """
+    Поиск кандидатов в БД по стратегии: model_name → category (+подкатегории) → вся БД.
+
+    При deduplicate=True поиск по категории и по всей БД сразу возвращает
+    последние версии моделей (DISTINCT ON в БД по version_priority);
+    результаты поиска по названию дедуплицируются в Python.
+    """
+    search_start_time = time.perf_counter()
+
+    # 1. Если указано точное название модели
+    if model_name:
+        logger.info("Searching by model_name: %s", model_name)
+        candidates = list(await get_model_by_name(model_name))
+        search_time = time.perf_counter() - search_start_time
+        logger.info("Found %d models by name in %.3fs", len(candidates), search_time)
+        if deduplicate:
+            candidates = deduplicate_models(candidates)
+
+    # 2. Если указана категория (но не модель)
+    elif category:
+        logger.info("Searching by category: %s", category)
+
+        # Категория и её подкатегории — одним запросом к БД
+        subcategories = CATEGORY_SUBCATEGORIES.get(category, [])
+        candidates = list(
+            await get_models_by_categories([category, *subcategories], deduplicate=deduplicate)
+        )
+        search_time = time.perf_counter() - search_start_time
+
+        # Разбивка по базовой категории — проход по всем кандидатам,
+        # нужна только для лога
+        if subcategories and logger.isEnabledFor(logging.INFO):
+            initial_count = sum(
+                1 for m in candidates if (m.category or "").lower() == category.lower()
+            )
+            logger.info(
+                "Found %d models (base: %d, subcategories: %d) in %.3fs",
+                len(candidates), initial_count, len(candidates) - initial_count, search_time,
+            )
+        elif not subcategories:
+            logger.info("Found %d models in category in %.3fs", len(candidates), search_time)
+
+    # 3. Поиск по всей БД (если ничего не указано)
+    else:
+        logger.info("Searching across all models (no model_name or category)")
+        candidates = list(await get_all_models(deduplicate=deduplicate))
+        search_time = time.perf_counter() - search_start_time
+        logger.info("Found %d models in database in %.3fs", len(candidates), search_time)
+
+    return candidates
+
+
+def _count_candidate_matches(
+    required_specs: Dict[str, Any],
+    candidate_specs: Sequence[Dict[str, Any]],
+    allow_lower: bool,
+) -> List[int]:
+    """
+    Число совпавших характеристик для каждого кандидата (в порядке candidate_specs).
+
+    Принимает только простые данные (словари характеристик), поэтому может
+    выполняться в дочернем процессе (см. _count_matches_in_processes).
+    """
+    numeric_batch = None
+    numeric_count = sum(
+        1 for v in required_specs.values() if not isinstance(v, bool)
+    )
+    if len(candidate_specs) * numeric_count > NUMPY_BATCH_MIN_CELLS:
+        numeric_batch = _numeric_match_matrix(required_specs, candidate_specs, allow_lower)
+
+    # Требования разбираются один раз для всех кандидатов
+    compiled = _compile_required_specs(required_specs, allow_lower)
+
+    if numeric_batch is None:
+        return [
+            0 if model_specs.keys().isdisjoint(required_specs)
+            else _count_matches(compiled, model_specs)
+            for model_specs in candidate_specs
+        ]
+
+    # Числовые совпадения уже посчитаны матрицей — суммируем по строкам.
+    # В Python остаются нечисловые требования и ячейки, где значение
+    # модели не число (текст сравнивается через compare_text_values)
+    numeric_keys, matched_mat, _, needs_python_mat = numeric_batch
+    numeric_key_set = set(numeric_keys)
+    compiled_numeric = [c for c in compiled if c[0] in numeric_key_set]
+    compiled_rest = [c for c in compiled if c[0] not in numeric_key_set]
+    counts = matched_mat.sum(axis=1).tolist()
+    # Строки без таких ячеек (обычно почти все) полностью посчитаны NumPy
+    rows_need_python = needs_python_mat.any(axis=1).tolist()
+
+    for i, model_specs in enumerate(candidate_specs):
+        if compiled_rest:
+            counts[i] += _count_matches(compiled_rest, model_specs)
+        if rows_need_python[i]:
+            counts[i] += _count_matches(
+                [
+                    c for c, needs_python in zip(compiled_numeric, needs_python_mat[i])
+                    if needs_python
+                ],
+                model_specs,
+            )
+    return counts
+
+
+# Пул процессов для больших наборов кандидатов (см. settings.matcher_processes)
+PROCESS_POOL_MIN_CANDIDATES = 2000
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Пул процессов создаётся при первом использовании и живёт до выхода."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.matcher_processes)
+    return _process_pool
+
+
+async def _count_matches_in_processes(
+    required_specs: Dict[str, Any],
+    candidates: Sequence[Model],
+    allow_lower: bool,
+) -> List[int]:
+    """
+    _count_candidate_matches по частям в пуле процессов.
+
+    В процессы передаются только словари характеристик (ORM-объекты не
+    сериализуются); результаты склеиваются в исходном порядке кандидатов.
+    """
+    workers = settings.matcher_processes
+    candidate_specs = [model.specifications for model in candidates]
+    chunk_size = -(-len(candidate_specs) // workers)
+
+    loop = asyncio.get_running_loop()
+    pool = _get_process_pool()
+    chunk_counts = await asyncio.gather(*(
+        loop.run_in_executor(
+            pool,
+            _count_candidate_matches,
+            required_specs,
+            candidate_specs[start:start + chunk_size],
+            allow_lower,
+        )
+        for start in range(0, len(candidate_specs), chunk_size)
+    ))
+    return list(chain.from_iterable(chunk_counts))
+
+
+def _score_candidates(
+    required_specs: Dict[str, Any],
+    candidates: Sequence[Model],
+    threshold: int,
+    allow_lower: bool,
+    limit: int = 0,
+    matched_counts: Optional[Sequence[int]] = None,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], int]:
+    """
+    CPU-часть сопоставления: оценка всех кандидатов и категоризация.
+
+    Синхронная функция — find_matching_models запускает её в пуле потоков,
+    чтобы не блокировать event loop бота.
+
+    Args:
+        matched_counts: Уже посчитанные _count_candidate_matches числа
+            совпадений (например, в пуле процессов); None — посчитать здесь
+
+    Returns:
+        Tuple (categorized, partial_total): partial_total — число частичных
+        совпадений до отсечения по limit (для итоговой сводки)
+    """
+    if matched_counts is None:
+        matched_counts = _count_candidate_matches(
+            required_specs, [model.specifications for model in candidates], allow_lower
+        )
+
+    total_specs = len(required_specs)
+
+    # Процент зависит только от числа совпавших характеристик — таблица
+    # значений считается один раз, а не round() на каждого кандидата
+    if total_specs:
+        percentage_by_count = [
+            round((count / total_specs) * 100.0, 2) for count in range(total_specs + 1)
+        ]
+    else:
+        percentage_by_count = [100.0]
+
+    matches = []
+    # Характеристики и детали попадают только в строки, которые может показать
+    # отчёт (см. ниже); остальные хранят лишь сводные поля
+    model_by_match: Dict[int, Model] = {}
+    for model, matched_count in zip(candidates, matched_counts):
+        match = {
+            "model_id": model.id,
+            "model_name": model.model_name,
+            "category": model.category,
+            "source_file": model.source_file,
+            "match_percentage": percentage_by_count[matched_count],
+        }
+        matches.append(match)
+        model_by_match[id(match)] = model
+
+    if limit:
+        partial_total = sum(
+            1 for m in matches
+            if m["match_percentage"] != 100.0 and m["match_percentage"] >= threshold
+        )
+    categorized = categorize_matches(matches, threshold, limit)
+    if not limit:
+        partial_total = len(categorized["partial"])
+
+    # Характеристики и детали (matched/unmapped/different) нужны только строкам,
+    # которые может показать отчёт: ideal/partial и not_matched не ниже
+    # REPORT_MIN_PERCENTAGE
+    display_min = min(threshold, settings.report_min_percentage)
+    compiled = _compile_required_specs(required_specs, allow_lower)
+    for match in chain(categorized["ideal"], categorized["partial"], categorized["not_matched"]):
+        if match["match_percentage"] < display_min:
+            continue
+        model = model_by_match[id(match)]
+        match["specifications"] = model.specifications
+        match["raw_specifications"] = model.raw_specifications
+        match.update(
+            calculate_match_percentage(
+                required_specs=required_specs,
+                model_specs=model.specifications,
+                allow_lower=allow_lower,
+                compiled=compiled,
+            )
+        )
+
+    return categorized, partial_total
+
+
+async def _process_item(
+    idx: int,
+    total: int,
+    item: Dict[str, Any],
+    candidates: List[Model],
+    threshold: int,
+    allow_lower: bool,
+    limit: int,
+) -> Tuple[Dict[str, Any], Tuple[int, int, int]]:
+    """
+    Сопоставление одной позиции ТЗ с уже найденными кандидатами.
+
+    Returns:
+        Tuple (result, counts): result — элемент results, counts — число
+        найденных моделей, идеальных и частичных совпадений для сводки
+    """
+    required_specs = item.get("required_specs", {})
+
+    logger.info(
+        "[Requirement %d/%d] model_name=%s, category=%s, specs=%d, candidates=%d",
+        idx, total, item.get("model_name"), item.get("category"),
+        len(required_specs), len(candidates),
+    )
+
+    matched_counts = None
+    if settings.matcher_processes and len(candidates) >= PROCESS_POOL_MIN_CANDIDATES:
+        matched_counts = await _count_matches_in_processes(
+            required_specs, candidates, allow_lower
+        )
+
+    loop = asyncio.get_running_loop()
+    categorized, partial_total = await loop.run_in_executor(
+        None, _score_candidates, required_specs, candidates, threshold, allow_lower, limit,
+        matched_counts,
+    )
+
+    counts = (len(candidates), len(categorized["ideal"]), partial_total)
+    return {"requirement": item, "matches": categorized}, counts
+
+
 async def find_matching_models(requirements: Dict[str, Any]) -> Dict[str, Any]:
     """
     Поиск и сопоставление моделей по требованиям из ТЗ.
@@ -534,7 +1100,7 @@ async def find_matching_models(requirements: Dict[str, Any]) -> Dict[str, Any]:
                     "matches": {
                         "ideal": [...],
                         "partial": [...],
-                        "not_matched": [...]
+                        "not_matched": [...]  # без specifications и деталей
                     }
                 }
             ],
@@ -564,120 +1130,55 @@ async def find_matching_models(requirements: Dict[str, Any]) -> Dict[str, Any]:
             },
         }
 
-    results = []
-    total_models_found = 0
-    ideal_matches = 0
-    partial_matches = 0
-
     threshold = settings.match_threshold
     allow_lower = settings.allow_lower_values
+    limit = settings.max_partial_results
 
     logger.info(
-        f"Starting matching with threshold={threshold}%, allow_lower={allow_lower}"
+        "Starting matching with threshold=%s%%, allow_lower=%s", threshold, allow_lower
     )
 
-    # Mapping категорий к подкатегориям для расширенного поиска
-    CATEGORY_SUBCATEGORIES = {
-        "Коммутаторы": ["Управляемый", "Неуправляемый", "Промышленный"],
-        "Маршрутизаторы": ["Универсальный шлюз безопасности", "Модульный"],
-        # Добавить другие категории по мере необходимости
-    }
-
-    for idx, item in enumerate(items, 1):
-        model_name = item.get("model_name")
-        category = item.get("category")
-        required_specs = item.get("required_specs", {})
-
-        logger.info(
-            f"[Requirement {idx}/{len(items)}] model_name={model_name}, category={category}, specs={len(required_specs)}"
-        )
-
-        # ────────────── СТРАТЕГИЯ ПОИСКА ──────────────
-
-        candidates = []
-        search_start_time = time.time()
-
-        # 1. Если указано точное название модели
-        if model_name:
-            logger.info(f"Searching by model_name: {model_name}")
-            candidates = await get_model_by_name(model_name)
-            search_time = time.time() - search_start_time
-            logger.info(f"Found {len(candidates)} models by name in {search_time:.3f}s")
-
-        # 2. Если указана категория (но не модель)
-        elif category:
-            logger.info(f"Searching by category: {category}")
-            candidates = await get_models_by_category(category)
-            initial_count = len(candidates)
-
-            # Расширенный поиск по подкатегориям
-            if category in CATEGORY_SUBCATEGORIES:
-                for subcategory in CATEGORY_SUBCATEGORIES[category]:
-                    subcategory_models = await get_models_by_category(subcategory)
-                    candidates.extend(subcategory_models)
-                    logger.debug(f"Added {len(subcategory_models)} models from subcategory '{subcategory}'")
-
-                search_time = time.time() - search_start_time
-                logger.info(
-                    f"Found {len(candidates)} models (base: {initial_count}, "
-                    f"subcategories: {len(candidates) - initial_count}) in {search_time:.3f}s"
-                )
-            else:
-                search_time = time.time() - search_start_time
-                logger.info(f"Found {len(candidates)} models in category in {search_time:.3f}s")
-
-        # 3. Поиск по всей БД (если ничего не указано)
-        else:
-            logger.info("Searching across all models (no model_name or category)")
-            all_models = await get_all_models()
-            candidates = list(all_models)
-            search_time = time.time() - search_start_time
-            logger.info(f"Found {len(candidates)} models in database in {search_time:.3f}s")
-
-        # ────────────── ДЕДУПЛИКАЦИЯ ──────────────
-
-        if settings.deduplicate_models:
-            candidates = deduplicate_models(candidates)
-
-        # ────────────── СОПОСТАВЛЕНИЕ ──────────────
-
-        matches = []
-        for model in candidates:
-            match_result = calculate_match_percentage(
-                required_specs=required_specs,
-                model_specs=model.specifications,
-                allow_lower=allow_lower,
-            )
+    # ────────────── СТРАТЕГИЯ ПОИСКА И ДЕДУПЛИКАЦИЯ ──────────────
 
-            matches.append(
-                {
-                    "model_id": model.id,
-                    "model_name": model.model_name,
-                    "category": model.category,
-                    "source_file": model.source_file,
-                    "match_percentage": match_result["match_percentage"],
-                    "matched_specs": match_result["matched_specs"],
-                    "unmapped_specs": match_result["unmapped_specs"],
-                    "missing_specs": match_result["missing_specs"],
-                    "different_specs": match_result["different_specs"],
-                    "specifications": model.specifications,
-                    "raw_specifications": model.raw_specifications,
-                }
+    # Позиции с одинаковыми (model_name, category) используют один и тот же
+    # набор кандидатов: каждый уникальный поиск выполняется один раз,
+    # все поиски — параллельно
+    search_keys = list(
+        dict.fromkeys((item.get("model_name"), item.get("category")) for item in items)
+    )
+    deduplicate = settings.deduplicate_models
+    found = await asyncio.gather(
+        *(_search_candidates(*key, deduplicate=deduplicate) for key in search_keys)
+    )
+    candidates_by_key = dict(zip(search_keys, found))
+
+    # ────────────── СОПОСТАВЛЕНИЕ И КАТЕГОРИЗАЦИЯ ──────────────
+
+    # Позиции независимы: сопоставление идёт параллельно,
+    # gather сохраняет исходный порядок позиций в results
+    processed = await asyncio.gather(
+        *(
+            _process_item(
+                idx, len(items), item,
+                candidates_by_key[(item.get("model_name"), item.get("category"))],
+                threshold, allow_lower, limit,
             )
-
-        # ────────────── КАТЕГОРИЗАЦИЯ ──────────────
-
-        categorized = categorize_matches(matches, threshold)
-
-        results.append({"requirement": item, "matches": categorized})
-
-        # Статистика
-        total_models_found += len(matches)
-        ideal_matches += len(categorized["ideal"])
-        partial_matches += len(categorized["partial"])
+            for idx, item in enumerate(items, 1)
+        )
+    )
 
     # ────────────── ИТОГОВАЯ СВОДКА ──────────────
 
+    results = []
+    total_models_found = 0
+    ideal_matches = 0
+    partial_matches = 0
+    for result, (found, ideal_count, partial_count) in processed:
+        results.append(result)
+        total_models_found += found
+        ideal_matches += ideal_count
+        partial_matches += partial_count
+
     summary = {
         "total_requirements": len(items),
         "total_models_found": total_models_found,
@@ -685,6 +1186,6 @@ async def find_matching_models(requirements: Dict[str, Any]) -> Dict[str, Any]:
         "partial_matches": partial_matches,
     }
 
-    logger.info(f"Matching completed: {summary}")
+    logger.info("Matching completed: %s", summary)
 
     return {"results": results, "summary": summary}
@@ -0,0 +1,109 @@
+"""
+Shared access to data/normalization_map.json, plus source file version parsing.
+
+The map is read lazily on first use and parsed once per process; the table
+parser (variant lookup) and the OpenAI parser prompt (canonical key list)
+both take their views from here. parse_version_priority is shared by the
+matcher's deduplication and the CSV import.
+"""
+
+import json
+import os
+import re
+import sys
+from functools import cache, lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple
+
+from utils.logger import logger
+
+
+NORMALIZATION_MAP_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "data", "normalization_map.json"
+)
+
+
+@cache
+def _load_canonical_keys() -> Mapping[str, List[str]]:
+    """
+    Load the "canonical_keys" section: canonical_key -> list of name variants.
+
+    Returns:
+        Read-only mapping; empty if the file is missing or invalid.
+    """
+    try:
+        with open(NORMALIZATION_MAP_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"normalization_map.json not found at {NORMALIZATION_MAP_PATH}")
+        return MappingProxyType({})
+    except Exception as e:
+        logger.error(f"Failed to load normalization_map.json: {e}")
+        return MappingProxyType({})
+
+    canonical_keys: Dict[str, List[str]] = data.get("canonical_keys", {})
+    logger.info(f"Loaded normalization map: {len(canonical_keys)} canonical keys")
+    return MappingProxyType(canonical_keys)
+
+
+@cache
+def get_canonical_keys() -> Tuple[str, ...]:
+    """Canonical characteristic keys in file order."""
+    return tuple(_load_canonical_keys())
+
+
+@cache
+def get_variant_map() -> Mapping[str, str]:
+    """
+    Reverse lookup: casefolded characteristic variant -> canonical key.
+
+    Returns:
+        Read-only mapping of casefolded, stripped variants to canonical keys.
+    """
+    # Keys repeat in every item's required_specs: share one string object
+    reverse_map: Dict[str, str] = {
+        variant.casefold().strip(): sys.intern(canonical_key)
+        for canonical_key, variants in _load_canonical_keys().items()
+        for variant in variants
+    }
+
+    logger.info(f"Built normalization lookup: {len(reverse_map)} variants")
+    return MappingProxyType(reverse_map)
+
+
+_RE_FINAL_UPD_V = re.compile(r'finalUPDv\.(\d+)\.(\d+)')
+_RE_V = re.compile(r'v(\d+)(?:\.(\d+))?')
+
+
+@lru_cache(maxsize=2048)
+def parse_version_priority(source_file: str) -> float:
+    """
+    Version priority encoded in a source_file name (higher = newer).
+
+    Rules:
+    - 'finalUPDv.X.Y' -> 1000 + Y (e.g. finalUPDv.1.2 -> 1002)
+    - 'finalUPD' without a version -> 1000
+    - 'vNN' or 'vNN.M' -> NN (the .M part is ignored)
+    - '_new' suffix -> +0.5
+    - no version -> 0
+    """
+    if not source_file:
+        return 0
+
+    priority = 0.0
+
+    # finalUPDv.X.Y ranks highest
+    m = _RE_FINAL_UPD_V.search(source_file)
+    if m:
+        priority = 1000 + int(m.group(2))
+    elif 'finalUPD' in source_file:
+        priority = 1000
+    else:
+        m = _RE_V.search(source_file)
+        if m:
+            priority = int(m.group(1))
+
+    if '_new' in source_file:
+        priority += 0.5
+
+    return priority
@@ -1,40 +1,238 @@
 """Two-stage OpenAI integration: Router (find tech section) + Parser (extract requirements)."""
 
+import asyncio
+import hashlib
 import json
-import os
+import re
+import time
+from functools import cache
 from typing import Any
 
 from openai import AsyncOpenAI, APIError, RateLimitError, APITimeoutError
 
 from config import settings
+from services.normalization import get_canonical_keys
 from utils.logger import logger
 
-client = AsyncOpenAI(api_key=settings.openai_api_key)
+# The SDK retries 429/5xx/timeouts itself, honouring Retry-After
+client = AsyncOpenAI(api_key=settings.openai_api_key, max_retries=settings.openai_max_retries)
 
-# Load canonical keys from normalization_map.json for the parser prompt
-_CANONICAL_KEYS: list[str] = []
-_normalization_map_path = os.path.join(
-    os.path.dirname(os.path.dirname(__file__)), "data", "normalization_map.json"
-)
-try:
-    with open(_normalization_map_path, "r", encoding="utf-8") as _f:
-        _norm_data = json.load(_f)
-        _CANONICAL_KEYS = list(_norm_data.get("canonical_keys", {}).keys())
-        logger.info(f"Loaded {len(_CANONICAL_KEYS)} canonical keys for OpenAI prompts")
-except FileNotFoundError:
-    logger.warning(f"normalization_map.json not found at {_normalization_map_path}")
-except Exception as e:
-    logger.error(f"Error loading normalization_map.json: {e}")
+# Bounds in-flight requests across all users so concurrent uploads queue up
+# instead of tripping the account's rate limits
+_request_slots = asyncio.Semaphore(settings.openai_max_concurrent_requests)
+
+# Routing hints for OpenAI prompt caching: requests sharing a key (and a long
+# identical prompt prefix) land on the same cache. Bump the version whenever
+# the prompt text changes.
+_ROUTER_PROMPT_CACHE_KEY = "router_v1"
+_PARSER_PROMPT_CACHE_KEY = "parser_v2"
 
 
 def _build_canonical_keys_description() -> str:
     """Build a formatted list of canonical keys for the parser prompt."""
-    if not _CANONICAL_KEYS:
+    canonical_keys = get_canonical_keys()
+    if not canonical_keys:
         return "Используй snake_case ключи на английском для характеристик."
-    lines = [f"- {key}" for key in _CANONICAL_KEYS]
+    lines = [f"- {key}" for key in canonical_keys]
     return "\n".join(lines)
 
 
+# Invariant prompt prefixes, built once; only the document text is appended
+# per request (which also keeps the prefix cacheable on OpenAI's side).
+# The Parser prefix lists the canonical keys, so it is built on first use.
+_ROUTER_PROMPT_PREFIX = (
+    "Твоя задача — найти в документе раздел с техническими требованиями к оборудованию.\n"
+    "Это может быть раздел: \"Технические требования\", \"Спецификация оборудования\", "
+    "\"Технические характеристики\", \"Приложение: ТЗ\" и т.п.\n\n"
+    "Верни ТОЛЬКО текст этого раздела. Не пересказывай, просто скопируй как есть.\n"
+    "Если раздел не найден, верни весь текст.\n\n"
+)
+
+
+@cache
+def _parser_prompt_prefix() -> str:
+    return (
+        "Ты - эксперт по телекоммуникационному оборудованию Eltex.\n\n"
+        "Проанализируй техническое задание тендера и извлеки требования к оборудованию.\n\n"
+        "ВАЖНО: Используй ТОЛЬКО эти ключи для характеристик:\n"
+        f"{_build_canonical_keys_description()}\n\n"
+        "Верни JSON в следующем формате:\n"
+        "{\n"
+        '  "items": [\n'
+        "    {\n"
+        '      "item_name": "Название позиции из ТЗ (как указано в документе)",\n'
+        '      "quantity": 1,\n'
+        '      "model_name": "Точное название модели (если указано) или null",\n'
+        '      "category": "Категория оборудования (Коммутаторы/Маршрутизаторы/Прочее) или null",\n'
+        '      "required_specs": [\n'
+        '        {"key": "canonical_key", "value": "значение"}\n'
+        "      ]\n"
+        "    }\n"
+        "  ]\n"
+        "}\n\n"
+        "Правила:\n"
+        "- Числовые характеристики: только числа без единиц измерения (24, а не \"24 порта\")\n"
+        "- ВАЖНО: Если в ТЗ указан оператор сравнения (≥, ≤, >, <, =), "
+        "сохрани его в значении: \">=24\", \"<=100\", \">2\", \"<50\"\n"
+        "- Если оператор не указан, но подразумевается \"не менее\", используй \">=значение\"\n"
+        "- Если подразумевается \"не более\" или \"до\", используй \"<=значение\"\n"
+        "- Если оператор не указан и не подразумевается, верни просто число: 24\n"
+        "- Булевые характеристики: true/false\n"
+        "- Текстовые характеристики: строки без изменений\n"
+        "- Если модель не указана явно, поставь model_name: null\n"
+        "- Каждая позиция оборудования из ТЗ — отдельный элемент в items\n"
+        "- Верни ТОЛЬКО валидный JSON без маркдаун-разметки\n\n"
+    )
+
+
+# Structured Outputs schema for the Parser: the API guarantees a response of
+# exactly this shape, so no key-presence fixups are needed afterwards. Strict
+# mode forbids free-form objects, hence required_specs comes back as
+# key/value pairs and is folded into a dict in parse_requirements.
+@cache
+def _parser_response_format() -> dict[str, Any]:
+    canonical_keys = list(get_canonical_keys())
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "tender_requirements",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "items": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "item_name": {"type": "string"},
+                                "quantity": {"type": "integer"},
+                                "model_name": {"type": ["string", "null"]},
+                                "category": {
+                                    "type": ["string", "null"],
+                                    "enum": ["Коммутаторы", "Маршрутизаторы", "Прочее", None],
+                                },
+                                "required_specs": {
+                                    "type": "array",
+                                    "items": {
+                                        "type": "object",
+                                        "properties": {
+                                            "key": (
+                                                {"type": "string", "enum": canonical_keys}
+                                                if canonical_keys else {"type": "string"}
+                                            ),
+                                            "value": {
+                                                "anyOf": [
+                                                    {"type": "string"},
+                                                    {"type": "number"},
+                                                    {"type": "boolean"},
+                                                ],
+                                            },
+                                        },
+                                        "required": ["key", "value"],
+                                        "additionalProperties": False,
+                                    },
+                                },
+                            },
+                            "required": ["item_name", "quantity", "model_name", "category", "required_specs"],
+                            "additionalProperties": False,
+                        },
+                    },
+                },
+                "required": ["items"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+# Router input limit (~100k chars ≈ 25k tokens)
+_ROUTER_MAX_CHARS = 100_000
+
+# Completion budgets: Router copies part of its input and Parser output scales
+# with the section length, so max_tokens is sized from the text (roughly
+# len // 2 tokens, between a floor and the previous fixed ceiling) instead of
+# reserving the ceiling for every request. The Parser's key/value array can
+# outgrow its input, so its floor is high and a cut-off answer is retried
+# with the ceiling.
+_ROUTER_MAX_TOKENS = (1_024, 16_000)
+_PARSER_MAX_TOKENS = (4_096, 8_000)
+
+
+def _output_token_budget(text: str, limits: tuple[int, int]) -> int:
+    floor, ceiling = limits
+    return min(ceiling, max(floor, len(text) // 2))
+
+
+# A heading like this at the start of a line near the top means the document
+# quickly reaches the technical section, so the Router can be skipped. A second
+# occurrence (table of contents, cross-reference) makes the cut ambiguous.
+_RE_TECH_SECTION_HEADING = re.compile(
+    r"^[ \t]*(?:технические\s+требования|спецификация\s+оборудования)",
+    re.IGNORECASE | re.MULTILINE,
+)
+_TECH_SECTION_HEADING_WINDOW = 5_000
+# Locally cut sections skip the Router's trimming, so they are held to about
+# what the Router itself could return
+_LOCAL_SECTION_MAX_CHARS = 40_000
+
+
+def _find_tech_section_locally(document_text: str) -> str | None:
+    """
+    Cheap pre-check before the Router: return the text to send straight to the
+    Parser, or None if the Router is needed. ROUTER_SKIP_CHARS=0 always
+    uses the Router.
+    """
+    if settings.router_skip_chars <= 0:
+        return None
+    if len(document_text) < settings.router_skip_chars:
+        return document_text
+
+    match = _RE_TECH_SECTION_HEADING.search(document_text, 0, _TECH_SECTION_HEADING_WINDOW)
+    if (
+        match
+        and len(document_text) - match.start() <= _LOCAL_SECTION_MAX_CHARS
+        and not _RE_TECH_SECTION_HEADING.search(document_text, match.end())
+    ):
+        return document_text[match.start():]
+
+    return None
+
+
+async def _create_completion(**kwargs: Any) -> Any:
+    """client.chat.completions.create, limited to OPENAI_MAX_CONCURRENT_REQUESTS at a time."""
+    async with _request_slots:
+        return await client.chat.completions.create(**kwargs)
+
+
+# Raw completion text by BLAKE2b(model + prompt): re-uploads of the same
+# document and retries after a failed step cost no OpenAI calls. Entries live
+# for OPENAI_CACHE_TTL seconds; the oldest is evicted beyond the size limit.
+_RESPONSE_CACHE_MAX_ENTRIES = 128
+_response_cache: dict[bytes, tuple[float, str]] = {}
+
+
+def _response_cache_key(model: str, prompt: str) -> bytes:
+    return hashlib.blake2b(f"{model}\0{prompt}".encode(), digest_size=16).digest()
+
+
+def _get_cached_response(key: bytes) -> str | None:
+    ttl = settings.openai_cache_ttl
+    cached = _response_cache.get(key)
+    if ttl > 0 and cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    return None
+
+
+def _put_cached_response(key: bytes, content: str) -> None:
+    if settings.openai_cache_ttl <= 0:
+        return
+    _response_cache.pop(key, None)
+    if len(_response_cache) >= _RESPONSE_CACHE_MAX_ENTRIES:
+        del _response_cache[next(iter(_response_cache))]
+    _response_cache[key] = (time.monotonic(), content)
+
+
 async def extract_tech_section(document_text: str) -> str:
     """
     Stage A (Router): Find the technical requirements section in a document.
@@ -48,27 +246,27 @@ async def extract_tech_section(document_text: str) -> str:
     Returns:
         Text of the technical requirements section.
     """
-    # Truncate very long documents to stay within token limits (~100k chars ≈ 25k tokens)
-    max_chars = 100_000
-    if len(document_text) > max_chars:
-        logger.warning(f"Document too long ({len(document_text)} chars), truncating to {max_chars}")
-        document_text = document_text[:max_chars]
-
-    prompt = (
-        "Твоя задача — найти в документе раздел с техническими требованиями к оборудованию.\n"
-        "Это может быть раздел: \"Технические требования\", \"Спецификация оборудования\", "
-        "\"Технические характеристики\", \"Приложение: ТЗ\" и т.п.\n\n"
-        "Верни ТОЛЬКО текст этого раздела. Не пересказывай, просто скопируй как есть.\n"
-        "Если раздел не найден, верни весь текст.\n\n"
-        f"Документ:\n{document_text}"
-    )
+    # Truncate very long documents to stay within token limits
+    if len(document_text) > _ROUTER_MAX_CHARS:
+        logger.warning(f"Document too long ({len(document_text)} chars), truncating to {_ROUTER_MAX_CHARS}")
+        document_text = document_text[:_ROUTER_MAX_CHARS]
+
+    prompt = f"{_ROUTER_PROMPT_PREFIX}Документ:\n{document_text}"
+
+    cache_key = _response_cache_key(settings.openai_router_model, prompt)
+    cached = _get_cached_response(cache_key)
+    if cached is not None:
+        logger.info(f"Router stage served from cache: result_len={len(cached)}")
+        return cached
 
     try:
-        response = await client.chat.completions.create(
+        response = await _create_completion(
             model=settings.openai_router_model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0,
-            max_tokens=16_000,
+            max_tokens=_output_token_budget(document_text, _ROUTER_MAX_TOKENS),
+            # Passed via extra_body: older SDKs have no prompt_cache_key argument
+            extra_body={"prompt_cache_key": _ROUTER_PROMPT_CACHE_KEY},
         )
         result = response.choices[0].message.content or ""
         tokens_used = response.usage
@@ -78,6 +276,7 @@ async def extract_tech_section(document_text: str) -> str:
             f"model={settings.openai_router_model}, "
             f"result_len={len(result)}"
         )
+        _put_cached_response(cache_key, result)
         return result
 
     except RateLimitError as e:
@@ -91,6 +290,17 @@ async def extract_tech_section(document_text: str) -> str:
         raise
 
 
+async def _create_parser_completion(prompt: str, max_tokens: int) -> Any:
+    return await _create_completion(
+        model=settings.openai_model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0,
+        max_tokens=max_tokens,
+        response_format=_parser_response_format(),
+        extra_body={"prompt_cache_key": _PARSER_PROMPT_CACHE_KEY},
+    )
+
+
 async def parse_requirements(tech_section: str, file_type: str = "docx") -> dict[str, Any]:
     """
     Stage B (Parser): Extract structured equipment requirements from the tech section.
@@ -104,72 +314,44 @@ async def parse_requirements(tech_section: str, file_type: str = "docx") -> dict
     Returns:
         Dict with 'items' list of requirement objects.
     """
-    canonical_keys_desc = _build_canonical_keys_description()
+    prompt = f"{_parser_prompt_prefix()}Технические требования ({file_type}):\n{tech_section}"
 
-    prompt = (
-        "Ты - эксперт по телекоммуникационному оборудованию Eltex.\n\n"
-        "Проанализируй техническое задание тендера и извлеки требования к оборудованию.\n\n"
-        "ВАЖНО: Используй ТОЛЬКО эти ключи для характеристик:\n"
-        f"{canonical_keys_desc}\n\n"
-        "Верни JSON в следующем формате:\n"
-        "{\n"
-        '  "items": [\n'
-        "    {\n"
-        '      "item_name": "Название позиции из ТЗ (как указано в документе)",\n'
-        '      "quantity": 1,\n'
-        '      "model_name": "Точное название модели (если указано) или null",\n'
-        '      "category": "Категория оборудования (Коммутаторы/Маршрутизаторы/Прочее)",\n'
-        '      "required_specs": {\n'
-        '        "canonical_key": "значение"\n'
-        "      }\n"
-        "    }\n"
-        "  ]\n"
-        "}\n\n"
-        "Правила:\n"
-        "- Числовые характеристики: только числа без единиц измерения (24, а не \"24 порта\")\n"
-        "- ВАЖНО: Если в ТЗ указан оператор сравнения (≥, ≤, >, <, =), "
-        "сохрани его в значении: \">=24\", \"<=100\", \">2\", \"<50\"\n"
-        "- Если оператор не указан, но подразумевается \"не менее\", используй \">=значение\"\n"
-        "- Если подразумевается \"не более\" или \"до\", используй \"<=значение\"\n"
-        "- Если оператор не указан и не подразумевается, верни просто число: 24\n"
-        "- Булевые характеристики: true/false\n"
-        "- Текстовые характеристики: строки без изменений\n"
-        "- Если модель не указана явно, поставь model_name: null\n"
-        "- Каждая позиция оборудования из ТЗ — отдельный элемент в items\n"
-        "- Верни ТОЛЬКО валидный JSON без маркдаун-разметки\n\n"
-        f"Технические требования ({file_type}):\n{tech_section}"
-    )
+    # The raw JSON is cached (not the dict) so every caller gets its own copy
+    cache_key = _response_cache_key(settings.openai_model, prompt)
+    raw_content = _get_cached_response(cache_key)
+    from_cache = raw_content is not None
 
     try:
-        response = await client.chat.completions.create(
-            model=settings.openai_model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-            max_tokens=8_000,
-            response_format={"type": "json_object"},
-        )
-        raw_content = response.choices[0].message.content or "{}"
-        tokens_used = response.usage
-        logger.info(
-            f"Parser stage complete: input={tokens_used.prompt_tokens}, "
-            f"output={tokens_used.completion_tokens}, "
-            f"model={settings.openai_model}"
-        )
-
+        if from_cache:
+            logger.info("Parser stage served from cache")
+        else:
+            max_tokens = _output_token_budget(tech_section, _PARSER_MAX_TOKENS)
+            response = await _create_parser_completion(prompt, max_tokens)
+            ceiling = _PARSER_MAX_TOKENS[1]
+            if response.choices[0].finish_reason == "length" and max_tokens < ceiling:
+                logger.warning(
+                    f"Parser output cut off at max_tokens={max_tokens}, retrying with {ceiling}"
+                )
+                response = await _create_parser_completion(prompt, ceiling)
+            raw_content = response.choices[0].message.content or "{}"
+            tokens_used = response.usage
+            logger.info(
+                f"Parser stage complete: input={tokens_used.prompt_tokens}, "
+                f"output={tokens_used.completion_tokens}, "
+                f"model={settings.openai_model}"
+            )
+
+        # The shape is enforced by _parser_response_format(); invalid JSON is
+        # still possible when even the ceiling cuts the output off
         result = json.loads(raw_content)
+        if not from_cache:
+            _put_cached_response(cache_key, raw_content)
 
-        # Validate structure
-        if "items" not in result:
-            logger.warning("OpenAI response missing 'items' key, wrapping in items list")
-            result = {"items": [result] if result else []}
-
-        for item in result["items"]:
-            if "required_specs" not in item:
-                item["required_specs"] = {}
-            if "model_name" not in item:
-                item["model_name"] = None
-            if "category" not in item:
-                item["category"] = None
+        # An empty message (e.g. a refusal) comes through as "{}"
+        for item in result.setdefault("items", []):
+            item["required_specs"] = {
+                spec["key"]: spec["value"] for spec in item["required_specs"]
+            }
 
         logger.info(f"Parsed {len(result['items'])} equipment items from document")
         return result
@@ -201,9 +383,13 @@ async def process_document(document_text: str, file_type: str = "docx") -> dict[
     """
     logger.info(f"Processing document ({file_type}): {len(document_text)} chars")
 
-    # Stage A: Extract tech section (cheap model)
-    tech_section = await extract_tech_section(document_text)
-    logger.info(f"Tech section extracted: {len(tech_section)} chars (from {len(document_text)} original)")
+    # Stage A: Extract tech section (cheap model), unless it is found locally
+    tech_section = _find_tech_section_locally(document_text)
+    if tech_section is not None:
+        logger.info(f"Router skipped: passing {len(tech_section)} chars straight to Parser")
+    else:
+        tech_section = await extract_tech_section(document_text)
+        logger.info(f"Tech section extracted: {len(tech_section)} chars (from {len(document_text)} original)")
 
     # Stage B: Parse requirements (smart model)
     requirements = await parse_requirements(tech_section, file_type)
@@ -13,53 +13,23 @@ Improvements over initial version (inspired by old_bot/processor/parsers/docx_pa
 - Extracts equipment quantity from a separate equipment-list table
 """
 
-import json
-import os
 import re
+import sys
+import zipfile
 from collections import defaultdict
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Pattern, Sequence, Tuple
 
-from docx import Document
+from docx.oxml.ns import qn
+from lxml import etree
+from services.normalization import get_variant_map
 from utils.logger import logger
 
 
 # ═══════════════════════════════════════════════════════════════════════════
-# Normalization Map Loader
+# Characteristic Name Normalization
 # ═══════════════════════════════════════════════════════════════════════════
 
 
-def _load_normalization_map() -> Dict[str, str]:
-    """
-    Load normalization map and create reverse lookup: variant -> canonical_key.
-
-    Returns:
-        Dict mapping lowercase characteristic variants to canonical keys.
-    """
-    norm_path = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)), "data", "normalization_map.json"
-    )
-
-    try:
-        with open(norm_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        reverse_map = {}
-        for canonical_key, variants in data.get("canonical_keys", {}).items():
-            for variant in variants:
-                clean_variant = variant.lower().strip()
-                reverse_map[clean_variant] = canonical_key
-
-        logger.info(f"Loaded normalization map: {len(reverse_map)} variants -> {len(data.get('canonical_keys', {}))} canonical keys")
-        return reverse_map
-
-    except Exception as e:
-        logger.error(f"Failed to load normalization_map.json: {e}")
-        return {}
-
-
-_NORMALIZATION_MAP = _load_normalization_map()
-
-
 def normalize_characteristic_name(name: str) -> Optional[str]:
     """
     Normalize a characteristic name to its canonical key.
@@ -70,8 +40,8 @@ def normalize_characteristic_name(name: str) -> Optional[str]:
     Returns:
         Canonical key or None if not found.
     """
-    clean_name = name.lower().strip()
-    return _NORMALIZATION_MAP.get(clean_name)
+    clean_name = name.casefold().strip()
+    return get_variant_map().get(clean_name)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -79,6 +49,20 @@ def normalize_characteristic_name(name: str) -> Optional[str]:
 # ═══════════════════════════════════════════════════════════════════════════
 
 
+# Patterns are compiled once: parse_value runs for every table row
+_RE_OPERATOR = re.compile(r'^([≥≤><≠]=?|>=|<=|!=)\s*')
+_RE_NOT_LESS = re.compile(r'не\s+менее\b', re.IGNORECASE)
+_RE_NOT_MORE = re.compile(r'не\s+более\b', re.IGNORECASE)
+_RE_UP_TO = re.compile(r'до\s+', re.IGNORECASE)
+_RE_NUMBER = re.compile(r'[\d,]+\.?\d*')
+
+# Unicode operators -> ASCII
+_OPERATOR_MAP = {'≥': '>=', '≤': '<=', '≠': '!=', '>': '>', '<': '<', '=': '='}
+
+_TRUE_VALUES = frozenset({"да", "yes", "истина", "true"})
+_FALSE_VALUES = frozenset({"нет", "no", "ложь", "false"})
+
+
 def parse_value(value_str: str, unit: str = "") -> Any:
     """
     Parse a characteristic value from table cell.
@@ -102,35 +86,40 @@ def parse_value(value_str: str, unit: str = "") -> Any:
 
     value_str = value_str.strip()
 
+    # Plain integers ("24", "6000") are the most common cells: skip the regexes
+    if value_str.isdigit():
+        try:
+            return int(value_str)
+        except ValueError:
+            pass  # Unicode digits like "²" that int() rejects
+
     # Boolean values
-    if value_str.lower() in ["да", "yes", "истина", "true"]:
+    value_lower = value_str.lower()
+    if value_lower in _TRUE_VALUES:
         return True
-    if value_str.lower() in ["нет", "no", "ложь", "false"]:
+    if value_lower in _FALSE_VALUES:
         return False
 
     # Определяем наличие оператора сравнения
-    operator_match = re.match(r'^([≥≤><≠]=?|>=|<=|!=)\s*', value_str)
+    operator_match = _RE_OPERATOR.match(value_str)
     operator = None
     if operator_match:
         raw_op = operator_match.group(1)
         # Нормализуем Unicode операторы в ASCII
-        op_map = {'≥': '>=', '≤': '<=', '≠': '!=', '>': '>', '<': '<', '=': '='}
-        operator = op_map.get(raw_op, raw_op)
+        operator = _OPERATOR_MAP.get(raw_op, raw_op)
 
     # Текстовые префиксы → оператор
     if not operator:
-        if re.match(r'не\s+менее\b', value_str, re.IGNORECASE):
+        if _RE_NOT_LESS.match(value_str):
             operator = ">="
-        elif re.match(r'не\s+более\b', value_str, re.IGNORECASE):
+        elif _RE_NOT_MORE.match(value_str):
             operator = "<="
-        elif re.match(r'до\s+', value_str, re.IGNORECASE):
+        elif _RE_UP_TO.match(value_str):
             operator = "<="
 
-    # Извлекаем числа из строки (без оператора)
-    value_for_numbers = re.sub(r'^[≥≤><≠=]+\s*', '', value_str)
-    value_for_numbers = re.sub(r'^(?:не\s+менее|не\s+более|до)\s+', '', value_for_numbers, flags=re.IGNORECASE)
-
-    numbers = re.findall(r'[\d,]+\.?\d*', value_for_numbers)
+    # Извлекаем числа из строки. Префикс-оператор не вырезаем: в нём нет
+    # цифр и запятых, поэтому на результат findall он не влияет
+    numbers = _RE_NUMBER.findall(value_str)
     if numbers:
         # Take the last (usually stricter) number
         num_str = numbers[-1].replace(',', '')
@@ -153,55 +142,183 @@ def parse_value(value_str: str, unit: str = "") -> Any:
     return value_str
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+# Cell Extraction
+# ═══════════════════════════════════════════════════════════════════════════
+
+_W_BODY = qn("w:body")
+_W_TBL = qn("w:tbl")
+_W_TR = qn("w:tr")
+_W_TC = qn("w:tc")
+_W_TC_PR = qn("w:tcPr")
+_W_GRID_SPAN = qn("w:gridSpan")
+_W_V_MERGE = qn("w:vMerge")
+_W_VAL = qn("w:val")
+_W_P = qn("w:p")
+_W_R = qn("w:r")
+_W_HYPERLINK = qn("w:hyperlink")
+_W_T = qn("w:t")
+_W_TAB = qn("w:tab")
+_W_PTAB = qn("w:ptab")
+_W_BR = qn("w:br")
+_W_CR = qn("w:cr")
+_W_NO_BREAK_HYPHEN = qn("w:noBreakHyphen")
+_W_TYPE = qn("w:type")
+
+
+def _cell_text(tc) -> str:
+    """
+    Text of a <w:tc> element read straight from the XML.
+
+    Same as python-docx ``cell.text``: paragraphs joined with newlines, only
+    runs directly in a paragraph or in its hyperlinks are read, so nested
+    tables, text boxes and tracked insertions are skipped.
+    """
+    paragraphs = []
+    for p in tc.iterchildren(_W_P):
+        parts = []
+        for node in p.iterchildren(_W_R, _W_HYPERLINK):
+            runs = node.iterchildren(_W_R) if node.tag == _W_HYPERLINK else (node,)
+            for r in runs:
+                for child in r:
+                    tag = child.tag
+                    if tag == _W_T:
+                        parts.append(child.text or "")
+                    elif tag == _W_TAB or tag == _W_PTAB:
+                        parts.append("\t")
+                    elif tag == _W_BR:
+                        # Page and column breaks have no text equivalent
+                        if child.get(_W_TYPE, "textWrapping") == "textWrapping":
+                            parts.append("\n")
+                    elif tag == _W_CR:
+                        parts.append("\n")
+                    elif tag == _W_NO_BREAK_HYPHEN:
+                        parts.append("-")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+# Same settings as python-docx's own parser: no entity expansion
+_XML_PARSER = etree.XMLParser(remove_blank_text=True, resolve_entities=False)
+
+_OFFICE_DOCUMENT_REL = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+)
+
+
+def _read_tables(file_path: str) -> List[Any]:
+    """
+    Top-level ``<w:tbl>`` elements of the main document part (same tables as
+    python-docx ``Document(file_path).tables``).
+
+    Only the main document XML is parsed: styles, numbering, headers and the
+    python-docx object model are never built.
+    """
+    with zipfile.ZipFile(file_path) as package:
+        rels = etree.fromstring(package.read("_rels/.rels"), _XML_PARSER)
+        part_name = next(
+            rel.get("Target") for rel in rels if rel.get("Type") == _OFFICE_DOCUMENT_REL
+        )
+        document = etree.fromstring(package.read(part_name.lstrip("/")), _XML_PARSER)
+
+    body = document.find(_W_BODY)
+    return [] if body is None else body.findall(_W_TBL)
+
+
+def _table_cells(tbl) -> List[List[str]]:
+    """
+    Stripped text of every cell, row by row, in a single pass over a ``<w:tbl>``.
+
+    Same layout as python-docx ``[cell.text.strip() for cell in row.cells]``: a
+    cell spanning several grid columns is repeated for each of them, and a
+    vertically merged continuation cell repeats the text of the cell above.
+    """
+    rows: List[List[str]] = []
+    above: List[str] = []  # previous row, indexed by grid offset
+    for tr in tbl.iterchildren(_W_TR):
+        cells: List[str] = []
+        for tc in tr.iterchildren(_W_TC):
+            grid_span = 1
+            v_merge = None
+            # One pass over <w:tcPr> children instead of a find() per property
+            for tc_pr in tc.iterchildren(_W_TC_PR):
+                for prop in tc_pr.iterchildren(_W_GRID_SPAN, _W_V_MERGE):
+                    if prop.tag == _W_GRID_SPAN:
+                        grid_span = int(prop.get(_W_VAL, 1))
+                    else:
+                        # <w:vMerge/> without a value means "continue"
+                        v_merge = prop.get(_W_VAL, "continue")
+            if v_merge == "continue":
+                offset = len(cells)
+                text = above[offset] if offset < len(above) else ""
+            else:
+                text = _cell_text(tc).strip()
+            if grid_span == 1:
+                cells.append(text)
+            else:
+                cells.extend([text] * grid_span)
+        rows.append(cells)
+        above = cells
+    return rows
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # Column Detection (from old_bot: dynamic, not fixed positions)
 # ═══════════════════════════════════════════════════════════════════════════
 
-# Header patterns for characteristics table columns
-_ITEM_NAME_PATTERNS = [
+def _any_of(patterns: Sequence[str]) -> Pattern[str]:
+    """Compile a pattern family into one alternation (one search per cell)."""
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+
+# Header patterns for characteristics table columns, matched against
+# lowercased cell text
+_ITEM_NAME_PATTERN = _any_of([
     r'наименование\s*(товара|оборудования|изделия|позиции)',
     r'тип\s*(оборудования|устройства)',
     r'раздел',
-]
-_ITEM_NUMBER_PATTERNS = [
+])
+_ITEM_NUMBER_PATTERN = _any_of([
     r'№\s*п/?п',
     r'^п/?п$',
     r'номер',
     r'^\d+$',  # purely numeric header (rare)
-]
-_CHAR_NAME_PATTERNS = [
+])
+_CHAR_NAME_PATTERN = _any_of([
     r'наименование\s*характеристик',
     r'характеристик',
     r'параметр',
     r'требование',
     r'показатель',
-]
-_VALUE_PATTERNS = [
+])
+_VALUE_PATTERN = _any_of([
     r'значение\s*(характеристики|параметра)?',
     r'требуемое\s*значение',
     r'^значение$',
     r'величина',
     r'^value$',
-]
-_UNIT_PATTERNS = [
+])
+_UNIT_PATTERN = _any_of([
     r'единица\s*(измерения)?',
     r'ед\.?\s*изм\.?',
     r'размерность',
-]
+])
 
 
-def _match_any_pattern(text: str, patterns: List[str]) -> bool:
-    """Return True if text matches any of the given regex patterns."""
-    t = text.lower().strip()
-    return any(re.search(p, t) for p in patterns)
+def _match_any_pattern(text: str, pattern: Pattern[str]) -> bool:
+    """Return True if text matches the given pattern family (see _any_of)."""
+    return pattern.search(text.lower().strip()) is not None
 
 
-def _detect_characteristics_columns(table) -> Optional[Dict[str, Any]]:
+def _detect_characteristics_columns(cells: List[List[str]]) -> Optional[Dict[str, Any]]:
     """
     Detect column indices in a characteristics table by scanning header rows.
 
     Checks up to the first 3 rows for headers (supports multi-row headers).
 
+    Args:
+        cells: Table cell matrix from _table_cells.
+
     Returns:
         Dict with keys: 'item_name', 'item_number', 'char_name', 'value', 'unit',
         'header_rows' (number of header rows to skip).
@@ -216,39 +333,44 @@ def _detect_characteristics_columns(table) -> Optional[Dict[str, Any]]:
     }
     header_rows = 1
 
-    for row_idx in range(min(3, len(table.rows))):
-        cells = [cell.text.strip() for cell in table.rows[row_idx].cells]
+    for row_idx, row in enumerate(cells[:3]):
 
-        for col_idx, cell_text in enumerate(cells):
+        for col_idx, cell_text in enumerate(row):
             if not cell_text:
                 continue
+            # Cells are already stripped; lowercase once for all pattern families
+            cell_lower = cell_text.lower()
 
-            if col_map["item_name"] is None and _match_any_pattern(cell_text, _ITEM_NAME_PATTERNS):
+            if col_map["item_name"] is None and _ITEM_NAME_PATTERN.search(cell_lower):
                 col_map["item_name"] = col_idx
                 header_rows = max(header_rows, row_idx + 1)
 
-            if col_map["item_number"] is None and _match_any_pattern(cell_text, _ITEM_NUMBER_PATTERNS):
+            if col_map["item_number"] is None and _ITEM_NUMBER_PATTERN.search(cell_lower):
                 col_map["item_number"] = col_idx
                 header_rows = max(header_rows, row_idx + 1)
 
-            if col_map["char_name"] is None and _match_any_pattern(cell_text, _CHAR_NAME_PATTERNS):
+            if col_map["char_name"] is None and _CHAR_NAME_PATTERN.search(cell_lower):
                 col_map["char_name"] = col_idx
                 header_rows = max(header_rows, row_idx + 1)
 
-            if col_map["value"] is None and _match_any_pattern(cell_text, _VALUE_PATTERNS):
+            if col_map["value"] is None and _VALUE_PATTERN.search(cell_lower):
                 col_map["value"] = col_idx
                 header_rows = max(header_rows, row_idx + 1)
 
-            if col_map["unit"] is None and _match_any_pattern(cell_text, _UNIT_PATTERNS):
+            if col_map["unit"] is None and _UNIT_PATTERN.search(cell_lower):
                 col_map["unit"] = col_idx
                 header_rows = max(header_rows, row_idx + 1)
 
+        # Every column found: further rows can change neither col_map nor header_rows
+        if None not in col_map.values():
+            break
+
     # char_name + value are mandatory
     if col_map["char_name"] is None or col_map["value"] is None:
         # Fallback: if value column not found, try the column right after char_name
         if col_map["char_name"] is not None and col_map["value"] is None:
             fallback_value = col_map["char_name"] + 1
-            if fallback_value < len(table.columns):
+            if fallback_value < max(map(len, cells), default=0):
                 col_map["value"] = fallback_value
                 logger.debug("Value column not found, using fallback (char_name + 1)")
         else:
@@ -266,35 +388,14 @@ def _get_cell(cells: List[str], idx: Optional[int]) -> str:
 
 
 # ═══════════════════════════════════════════════════════════════════════════
-# Characteristics Table Detection
+# Equipment List Table (from old_bot: _extract_equipment_list)
 # ═══════════════════════════════════════════════════════════════════════════
 
 
-def _is_characteristics_table(table) -> bool:
-    """
-    Check if a table has the expected characteristics format.
-
-    Looks for columns matching characteristic-name and value patterns
-    in the first 3 header rows.
+_RE_DIGITS = re.compile(r'\d+')
 
-    Args:
-        table: python-docx Table object.
 
-    Returns:
-        True if table matches characteristics format.
-    """
-    if not table.rows or len(table.rows) < 2:
-        return False
-
-    return _detect_characteristics_columns(table) is not None
-
-
-# ═══════════════════════════════════════════════════════════════════════════
-# Equipment List Table (from old_bot: _extract_equipment_list)
-# ═══════════════════════════════════════════════════════════════════════════
-
-
-def _extract_equipment_list(table) -> Dict[str, int]:
+def _extract_equipment_list(rows: List[List[str]]) -> Dict[str, int]:
     """
     Extract equipment quantities from an equipment-list table.
 
@@ -304,16 +405,16 @@ def _extract_equipment_list(table) -> Dict[str, int]:
     Adapted from old_bot/processor/parsers/docx_parser.py::_extract_equipment_list.
 
     Args:
-        table: python-docx Table object.
+        rows: Table cell matrix from _table_cells.
 
     Returns:
         Dict mapping lowercased item name to integer quantity (default 1).
     """
-    if len(table.rows) < 2:
+    if len(rows) < 2:
         return {}
 
     # Check first row for "name" and "quantity" columns
-    first_row = [cell.text.strip().lower() for cell in table.rows[0].cells]
+    first_row = [cell.lower() for cell in rows[0]]
 
     has_name = any(
         "наименование" in cell or "оборудование" in cell or "товар" in cell
@@ -340,8 +441,7 @@ def _extract_equipment_list(table) -> Dict[str, int]:
         return {}
 
     result: Dict[str, int] = {}
-    for row in table.rows[1:]:
-        cells = [cell.text.strip() for cell in row.cells]
+    for cells in rows[1:]:
         if not any(cells):
             continue
 
@@ -352,9 +452,9 @@ def _extract_equipment_list(table) -> Dict[str, int]:
         qty = 1
         if qty_col is not None:
             qty_str = _get_cell(cells, qty_col)
-            digits = re.findall(r'\d+', qty_str)
+            digits = _RE_DIGITS.search(qty_str)
             if digits:
-                qty = int(digits[0])
+                qty = int(digits.group())
 
         result[name.lower()] = qty
 
@@ -387,13 +487,43 @@ def _match_quantity(item_name: str, equipment_list: Dict[str, int]) -> Optional[
 # ═══════════════════════════════════════════════════════════════════════════
 
 
-def _parse_table_rows(table, col_map: Dict[str, Any]) -> List[Dict[str, Any]]:
+_RE_NON_WORD = re.compile(r'\W+')
+
+
+def _characteristic_key(char_name: str, variant_map: Mapping[str, str]) -> Optional[str]:
+    """
+    Canonical key for a (stripped) characteristic name, or None for sub-header rows.
+
+    Unknown names fall back to snake_case of the raw name.
+    """
+    # Casefold once for the header check, the normalization lookup and the fallback
+    char_key = char_name.casefold()
+
+    # Rows that look like sub-headers
+    if _CHAR_NAME_PATTERN.search(char_key):
+        return None
+
+    canonical_key = variant_map.get(char_key)
+    if not canonical_key:
+        logger.debug(f"Could not normalize characteristic: '{char_name}'")
+        canonical_key = sys.intern(_RE_NON_WORD.sub('_', char_key).strip('_'))
+    return canonical_key
+
+
+def _parse_table_rows(
+    rows: List[List[str]],
+    col_map: Dict[str, Any],
+    key_cache: Optional[Dict[str, Optional[str]]] = None,
+) -> List[Dict[str, Any]]:
     """
     Parse all data rows from a characteristics table using detected column map.
 
     Args:
-        table: python-docx Table object.
+        rows: Table cell matrix from _table_cells.
         col_map: Column map from _detect_characteristics_columns.
+        key_cache: characteristic name -> result of _characteristic_key, shared
+            across the tables of one document (the same names repeat for
+            every item).
 
     Returns:
         List of parsed row dicts.
@@ -401,44 +531,46 @@ def _parse_table_rows(table, col_map: Dict[str, Any]) -> List[Dict[str, Any]]:
     header_rows: int = col_map.get("header_rows", 1)
     parsed_rows = []
 
+    variant_map = get_variant_map()
+    if key_cache is None:
+        key_cache = {}
+
+    name_col = col_map["item_name"]
+    number_col = col_map["item_number"]
+    char_col = col_map["char_name"]
+    value_col = col_map["value"]
+    unit_col = col_map["unit"]
+
     # Track last seen item_name and item_number for merged cells
     last_item_name = ""
     last_item_number = ""
 
-    for row in table.rows[header_rows:]:
-        cells = [cell.text.strip() for cell in row.cells]
-
+    for cells in rows[header_rows:]:
         if not any(cells):
             continue
 
-        # Get cell values using detected column indices
-        item_name = _get_cell(cells, col_map["item_name"]) or last_item_name
-        item_number = _get_cell(cells, col_map["item_number"]) or last_item_number
-        char_name = _get_cell(cells, col_map["char_name"])
-        value = _get_cell(cells, col_map["value"])
-        unit = _get_cell(cells, col_map["unit"])
-
-        # Update last seen values for merged-cell propagation
-        if _get_cell(cells, col_map["item_name"]):
-            last_item_name = item_name
-        if _get_cell(cells, col_map["item_number"]):
-            last_item_number = item_number
+        # Get cell values using detected column indices;
+        # empty item cells inherit the last seen value (merged-cell propagation)
+        item_name = last_item_name = _get_cell(cells, name_col) or last_item_name
+        item_number = last_item_number = _get_cell(cells, number_col) or last_item_number
+        char_name = _get_cell(cells, char_col)
+        value = _get_cell(cells, value_col)
+        unit = _get_cell(cells, unit_col)
 
         # Skip rows without characteristic name
         if not char_name:
             continue
 
+        # Normalize characteristic name (each distinct name is resolved once)
+        if char_name in key_cache:
+            canonical_key = key_cache[char_name]
+        else:
+            canonical_key = key_cache[char_name] = _characteristic_key(char_name, variant_map)
+
         # Skip rows that look like sub-headers
-        if _match_any_pattern(char_name, _CHAR_NAME_PATTERNS):
+        if canonical_key is None:
             continue
 
-        # Normalize characteristic name
-        canonical_key = normalize_characteristic_name(char_name)
-        if not canonical_key:
-            logger.debug(f"Could not normalize characteristic: '{char_name}'")
-            # Fallback: snake_case from raw name
-            canonical_key = re.sub(r'\W+', '_', char_name.lower().strip()).strip('_')
-
         # Parse value
         parsed_value = parse_value(value, unit)
 
@@ -455,6 +587,9 @@ def _parse_table_rows(table, col_map: Dict[str, Any]) -> List[Dict[str, Any]]:
     return parsed_rows
 
 
+_RE_ITEM_PREFIX = re.compile(r'^(\d+)')
+
+
 def _group_requirements_by_item(rows: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
     """
     Group parsed rows by equipment item.
@@ -469,25 +604,45 @@ def _group_requirements_by_item(rows: List[Dict[str, Any]]) -> Dict[str, List[Di
         Dict mapping group_key -> list of requirements.
     """
     groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    # item_number -> numeric prefix (or None); merged cells repeat the same
+    # number on every row of an item, so each distinct value is matched once
+    number_prefixes: Dict[str, Optional[str]] = {}
 
     for row in rows:
         item_num = row["item_number"]
 
         # Extract numeric prefix (e.g., "1.1" -> "1", "2.3" -> "2")
-        match = re.match(r'^(\d+)', item_num)
-        if match:
-            prefix = match.group(1)
-        elif row["item_name"]:
+        if item_num not in number_prefixes:
+            match = _RE_ITEM_PREFIX.match(item_num)
+            number_prefixes[item_num] = match.group(1) if match else None
+        prefix = number_prefixes[item_num]
+
+        if prefix is None:
             # No item_number — group by item_name
-            prefix = row["item_name"]
-        else:
-            prefix = "default"
+            prefix = row["item_name"] or "default"
 
         groups[prefix].append(row)
 
     return groups
 
 
+# Category by item name: checked in order, the first family that occurs
+# anywhere in the lowercased name wins (so "коммутатор" beats "маршрутизатор")
+_CATEGORY_PATTERNS: Tuple[Tuple[Pattern[str], str], ...] = (
+    (re.compile(r'коммутатор|switch'), "Коммутаторы"),
+    (re.compile(r'маршрутизатор|router'), "Маршрутизаторы"),
+)
+
+
+def _infer_category(item_name: str) -> Optional[str]:
+    """Category for an item name, or None if no pattern matches."""
+    item_lower = item_name.lower()
+    for pattern, category in _CATEGORY_PATTERNS:
+        if pattern.search(item_lower):
+            return category
+    return None
+
+
 def _build_item_dict(
     item_prefix: str,
     requirements: List[Dict[str, Any]],
@@ -519,12 +674,7 @@ def _build_item_dict(
     item_name = item_names[0] if item_names else f"Позиция {item_prefix}"
 
     # Try to infer category from item_name
-    category = None
-    item_lower = item_name.lower()
-    if "коммутатор" in item_lower or "switch" in item_lower:
-        category = "Коммутаторы"
-    elif "маршрутизатор" in item_lower or "router" in item_lower:
-        category = "Маршрутизаторы"
+    category = _infer_category(item_name)
 
     # Build required_specs dict
     required_specs: Dict[str, Any] = {}
@@ -570,25 +720,27 @@ def parse_requirements_from_tables(file_path: str) -> Optional[Dict[str, Any]]:
         Dict with 'items' list (compatible with OpenAI format), or None if parsing failed.
     """
     try:
-        doc = Document(file_path)
+        tables = _read_tables(file_path)
     except Exception as e:
         logger.error(f"Failed to open DOCX: {e}")
         return None
 
-    logger.info(f"Analyzing {len(doc.tables)} tables in document")
+    logger.info(f"Analyzing {len(tables)} tables in document")
 
-    # Pass 1: scan all tables — classify each as characteristics table or equipment list
-    characteristics_tables: List[Tuple[int, Any, Dict]] = []  # (idx, table, col_map)
+    # Pass 1: scan all tables — classify each as characteristics table or equipment list.
+    # Cell text is read once per table and reused by detection and row parsing.
+    characteristics_tables: List[Tuple[int, List[List[str]], Dict]] = []  # (idx, cells, col_map)
     equipment_list: Dict[str, int] = {}
 
-    for idx, table in enumerate(doc.tables):
-        col_map = _detect_characteristics_columns(table)
+    for idx, tbl in enumerate(tables):
+        cells = _table_cells(tbl)
+        col_map = _detect_characteristics_columns(cells)
         if col_map is not None:
-            logger.info(f"Found characteristics table at index {idx} ({len(table.rows)} rows), columns={col_map}")
-            characteristics_tables.append((idx, table, col_map))
+            logger.info(f"Found characteristics table at index {idx} ({len(cells)} rows), columns={col_map}")
+            characteristics_tables.append((idx, cells, col_map))
         else:
             # Try as equipment list table
-            eq_list = _extract_equipment_list(table)
+            eq_list = _extract_equipment_list(cells)
             if eq_list:
                 logger.info(f"Found equipment list table at index {idx} ({len(eq_list)} items)")
                 equipment_list.update(eq_list)
@@ -602,8 +754,9 @@ def parse_requirements_from_tables(file_path: str) -> Optional[Dict[str, Any]]:
 
     # Pass 2: parse all characteristics tables and merge rows
     all_parsed_rows: List[Dict[str, Any]] = []
-    for idx, table, col_map in characteristics_tables:
-        rows = _parse_table_rows(table, col_map)
+    key_cache: Dict[str, Optional[str]] = {}
+    for idx, cells, col_map in characteristics_tables:
+        rows = _parse_table_rows(cells, col_map, key_cache)
         logger.info(f"Table {idx}: parsed {len(rows)} requirement rows")
         all_parsed_rows.extend(rows)
 
@@ -618,8 +771,12 @@ def parse_requirements_from_tables(file_path: str) -> Optional[Dict[str, Any]]:
 
     # Build items list
     items = []
-    for prefix in sorted(groups.keys(), key=lambda x: int(x) if x.isdigit() else 0):
-        item_dict = _build_item_dict(prefix, groups[prefix], equipment_list)
+    # Numbered items in numeric order, name-keyed groups first in parse order
+    # (stable sort); isdecimal, not isdigit, so int() never sees e.g. "²"
+    for prefix, requirements in sorted(
+        groups.items(), key=lambda group: int(group[0]) if group[0].isdecimal() else 0
+    ):
+        item_dict = _build_item_dict(prefix, requirements, equipment_list)
         if item_dict:
             items.append(item_dict)
 
@@ -0,0 +1,115 @@
+"""Tests for database/crud.py — get_all_models cache and deduplicating queries."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from config import settings
+from database import crud
+from tests.conftest import make_model
+
+
+def _session_maker(rows):
+    """Fake async_session_maker: every session.execute returns `rows`."""
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = rows
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=result)
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=session), session
+
+
+@pytest.fixture(autouse=True)
+def _reset_cache():
+    crud.invalidate_models_cache()
+    yield
+    crud.invalidate_models_cache()
+
+
+class TestGetAllModelsCache:
+    @pytest.mark.asyncio
+    async def test_second_call_served_from_cache(self):
+        rows = [make_model("MES2324")]
+        maker, session = _session_maker(rows)
+        with patch.object(crud, "async_session_maker", maker), \
+                patch.object(settings, "all_models_cache_ttl", 60):
+            assert await crud.get_all_models() == rows
+            assert await crud.get_all_models() == rows
+        assert session.execute.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_ttl_zero_disables_cache(self):
+        maker, session = _session_maker([])
+        with patch.object(crud, "async_session_maker", maker), \
+                patch.object(settings, "all_models_cache_ttl", 0):
+            await crud.get_all_models()
+            await crud.get_all_models()
+        assert session.execute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_forces_reload(self):
+        maker, session = _session_maker([])
+        with patch.object(crud, "async_session_maker", maker), \
+                patch.object(settings, "all_models_cache_ttl", 60):
+            await crud.get_all_models()
+            crud.invalidate_models_cache()
+            await crud.get_all_models()
+        assert session.execute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_deduplicated_snapshot_cached_separately(self):
+        maker, session = _session_maker([])
+        with patch.object(crud, "async_session_maker", maker), \
+                patch.object(settings, "all_models_cache_ttl", 60):
+            await crud.get_all_models()
+            await crud.get_all_models(deduplicate=True)
+            await crud.get_all_models(deduplicate=True)
+        assert session.execute.await_count == 2
+        assert "DISTINCT ON" in str(
+            session.execute.await_args_list[1].args[0].compile(dialect=postgresql.dialect())
+        )
+
+
+class TestGetModelsByCategoriesCache:
+    @pytest.mark.asyncio
+    async def test_same_categories_served_from_cache(self):
+        rows = [make_model("MES2324", category="Коммутаторы")]
+        maker, session = _session_maker(rows)
+        with patch.object(crud, "async_session_maker", maker), \
+                patch.object(settings, "all_models_cache_ttl", 60):
+            assert await crud.get_models_by_categories(["Коммутаторы"]) == rows
+            # Регистр категорий не влияет на ключ кэша
+            assert await crud.get_models_by_categories(["коммутаторы"]) == rows
+        assert session.execute.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_key_includes_categories_and_deduplicate(self):
+        maker, session = _session_maker([])
+        with patch.object(crud, "async_session_maker", maker), \
+                patch.object(settings, "all_models_cache_ttl", 60):
+            await crud.get_models_by_categories(["Коммутаторы"])
+            await crud.get_models_by_categories(["Коммутаторы"], deduplicate=True)
+            await crud.get_models_by_categories(["Коммутаторы", "Управляемый"])
+        assert session.execute.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_invalidate_forces_reload(self):
+        maker, session = _session_maker([])
+        with patch.object(crud, "async_session_maker", maker), \
+                patch.object(settings, "all_models_cache_ttl", 60):
+            await crud.get_models_by_categories(["Коммутаторы"])
+            crud.invalidate_models_cache()
+            await crud.get_models_by_categories(["Коммутаторы"])
+        assert session.execute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_single_category_shares_query_and_cache(self):
+        rows = [make_model("MES2324", category="Коммутаторы")]
+        maker, session = _session_maker(rows)
+        with patch.object(crud, "async_session_maker", maker), \
+                patch.object(settings, "all_models_cache_ttl", 60):
+            assert await crud.get_models_by_category("Коммутаторы") == rows
+            assert await crud.get_models_by_categories(["коммутаторы"]) == rows
+        assert session.execute.await_count == 1
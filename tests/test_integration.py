@@ -91,6 +91,203 @@ class TestFullCycle:
             total_found = result["summary"]["total_models_found"]
             assert total_found == 300, f"Expected 300 models, got {total_found} (limit was not removed!)"
 
+    @pytest.mark.asyncio
+    async def test_multiple_items_keep_order_and_summary(self):
+        """
+        Позиции обрабатываются параллельно, но results идут в порядке items,
+        а сводка суммирует статистику по всем позициям.
+        """
+        from services.matcher import find_matching_models
+
+        mock_models = []
+        for i in range(10):
+            model = MagicMock()
+            model.id = i
+            model.model_name = f"Model_{i}"
+            model.category = "Коммутаторы"
+            model.source_file = "v20.csv"
+            model.specifications = {"ports_1g_rj45": 20 + i}
+            model.raw_specifications = {}
+            mock_models.append(model)
+
+        with patch("services.matcher.get_all_models", new_callable=AsyncMock) as mock_get_all:
+            mock_get_all.return_value = mock_models
+
+            requirements = {
+                "items": [
+                    {"item_name": "A", "model_name": None, "category": None,
+                     "required_specs": {"ports_1g_rj45": 29}},
+                    {"item_name": "B", "model_name": None, "category": None,
+                     "required_specs": {"ports_1g_rj45": 20}},
+                ]
+            }
+
+            result = await find_matching_models(requirements)
+
+        # Одинаковый поиск (всё БД) для обеих позиций выполняется один раз
+        mock_get_all.assert_awaited_once()
+        assert [r["requirement"]["item_name"] for r in result["results"]] == ["A", "B"]
+        assert len(result["results"][0]["matches"]["ideal"]) == 1
+        assert len(result["results"][1]["matches"]["ideal"]) == 10
+        assert result["summary"]["total_models_found"] == 20
+        assert result["summary"]["ideal_matches"] == 11
+
+    @pytest.mark.asyncio
+    async def test_max_partial_results_limits_lists_not_summary(self):
+        """
+        MAX_PARTIAL_RESULTS обрезает списки partial/not_matched,
+        но сводка считает все найденные модели.
+        """
+        from config import settings
+        from services.matcher import find_matching_models
+
+        mock_models = []
+        for i in range(10):
+            model = MagicMock()
+            model.id = i
+            model.model_name = f"Model_{i}"
+            model.category = "Коммутаторы"
+            model.source_file = "v20.csv"
+            model.specifications = {"ports_1g_rj45": 20 + i}
+            model.raw_specifications = {}
+            mock_models.append(model)
+
+        requirements = {
+            "items": [
+                {"model_name": None, "category": None,
+                 "required_specs": {"ports_1g_rj45": 25, "poe_support": True}},
+            ]
+        }
+
+        with patch("services.matcher.get_all_models", new_callable=AsyncMock) as mock_get_all, \
+                patch.object(settings, "match_threshold", 50), \
+                patch.object(settings, "max_partial_results", 3):
+            mock_get_all.return_value = mock_models
+            result = await find_matching_models(requirements)
+
+        matches = result["results"][0]["matches"]
+        assert len(matches["partial"]) == 3
+        assert len(matches["not_matched"]) == 3
+        # Характеристики и детали — только у строк не ниже порога отчёта
+        assert all("specifications" in m and "matched_specs" in m for m in matches["partial"])
+        assert all("specifications" not in m for m in matches["not_matched"])
+        assert result["summary"]["total_models_found"] == 10
+        assert result["summary"]["partial_matches"] == 5
+
+    @pytest.mark.asyncio
+    async def test_report_rows_below_threshold_get_details(self):
+        """
+        При MATCH_THRESHOLD выше REPORT_MIN_PERCENTAGE модели not_matched
+        между ними попадают в отчёт — у них должны быть детали совпадения.
+        """
+        from config import settings
+        from services.matcher import find_matching_models
+
+        mock_models = []
+        for i, ports in enumerate((24, 12)):
+            model = MagicMock()
+            model.id = i
+            model.model_name = f"Model_{i}"
+            model.category = "Коммутаторы"
+            model.source_file = "v20.csv"
+            model.specifications = {"ports_1g_rj45": ports, "poe_support": True,
+                                    "layer": 3, "power_watt": 200, "fans": 2}
+            model.raw_specifications = {}
+            mock_models.append(model)
+
+        requirements = {
+            "items": [
+                {"model_name": None, "category": None,
+                 "required_specs": {"ports_1g_rj45": 24, "poe_support": True,
+                                    "layer": 3, "power_watt": 200, "fans": 4}},
+            ]
+        }
+
+        with patch("services.matcher.get_all_models", new_callable=AsyncMock) as mock_get_all, \
+                patch.object(settings, "match_threshold", 90), \
+                patch.object(settings, "report_min_percentage", 80.0):
+            mock_get_all.return_value = mock_models
+            result = await find_matching_models(requirements)
+
+        shown, hidden = result["results"][0]["matches"]["not_matched"]
+        assert shown["match_percentage"] == 80.0
+        assert len(shown["matched_specs"]) == 4
+        assert shown["different_specs"] == {"fans": (4, 2)}
+        assert shown["specifications"] is mock_models[0].specifications
+        assert hidden["match_percentage"] == 60.0
+        assert "matched_specs" not in hidden and "specifications" not in hidden
+
+    @pytest.mark.asyncio
+    async def test_category_search_single_query_with_subcategories(self):
+        """Категория и её подкатегории запрашиваются из БД одним вызовом."""
+        from services.matcher import CATEGORY_SUBCATEGORIES, find_matching_models
+
+        model = MagicMock()
+        model.id = 1
+        model.model_name = "MES2324"
+        model.category = "Управляемый"
+        model.source_file = "v20.csv"
+        model.specifications = {"ports_1g_rj45": 24}
+        model.raw_specifications = {}
+
+        with patch(
+            "services.matcher.get_models_by_categories", new_callable=AsyncMock
+        ) as mock_get:
+            mock_get.return_value = [model]
+            result = await find_matching_models(
+                {"items": [{"model_name": None, "category": "Коммутаторы",
+                            "required_specs": {"ports_1g_rj45": 24}}]}
+            )
+
+        mock_get.assert_awaited_once_with(
+            ["Коммутаторы", *CATEGORY_SUBCATEGORIES["Коммутаторы"]], deduplicate=True
+        )
+        assert result["summary"]["ideal_matches"] == 1
+
+    @pytest.mark.asyncio
+    async def test_process_pool_scoring_matches_in_process(self):
+        """MATCHER_PROCESSES: оценка в пуле процессов даёт тот же результат."""
+        from config import settings
+        from services import matcher
+
+        mock_models = []
+        for i in range(12):
+            model = MagicMock()
+            model.id = i
+            model.model_name = f"Model_{i}"
+            model.category = "Коммутаторы"
+            model.source_file = "v20.csv"
+            model.specifications = {
+                "ports_1g_rj45": 20 + i,
+                "layer": "L3" if i % 2 else "нет данных",
+                "poe_support": i % 3 == 0,
+            }
+            model.raw_specifications = {}
+            mock_models.append(model)
+
+        requirements = {
+            "items": [
+                {"model_name": None, "category": None,
+                 "required_specs": {"ports_1g_rj45": 24, "layer": ">=3", "poe_support": True}},
+            ]
+        }
+
+        with patch("services.matcher.get_all_models", new_callable=AsyncMock) as mock_get_all:
+            mock_get_all.return_value = mock_models
+            expected = await matcher.find_matching_models(requirements)
+
+            with patch.object(settings, "matcher_processes", 2), \
+                    patch.object(matcher, "PROCESS_POOL_MIN_CANDIDATES", 5), \
+                    patch.object(matcher, "_process_pool", None):
+                try:
+                    result = await matcher.find_matching_models(requirements)
+                    assert matcher._process_pool is not None
+                finally:
+                    if matcher._process_pool is not None:
+                        matcher._process_pool.shutdown()
+
+        assert result == expected
+
     @pytest.mark.asyncio
     async def test_numeric_comparison_works_after_bugfix(self):
         """
@@ -102,26 +299,26 @@ class TestFullCycle:
         from services.matcher import compare_spec_values
 
         # Простые числа
-        assert compare_spec_values(24, 24, "ports") is True
-        assert compare_spec_values(24, 30, "ports") is True
-        assert compare_spec_values(24, 20, "ports") is False
+        assert compare_spec_values(24, 24) is True
+        assert compare_spec_values(24, 30) is True
+        assert compare_spec_values(24, 20) is False
 
         # Строки с числами
-        assert compare_spec_values("24 порта", 24, "ports") is True
-        assert compare_spec_values("24 порта", 30, "ports") is True
-        assert compare_spec_values("24 порта", 20, "ports") is False
+        assert compare_spec_values("24 порта", 24) is True
+        assert compare_spec_values("24 порта", 30) is True
+        assert compare_spec_values("24 порта", 20) is False
 
         # Диапазоны
-        assert compare_spec_values("10-20", 25, "range") is True
-        assert compare_spec_values("10-20", 15, "range") is False
+        assert compare_spec_values("10-20", 25) is True
+        assert compare_spec_values("10-20", 15) is False
 
         # Умножение
-        assert compare_spec_values("2x4", 10, "calc") is True
-        assert compare_spec_values("2x4", 5, "calc") is False
+        assert compare_spec_values("2x4", 10) is True
+        assert compare_spec_values("2x4", 5) is False
 
         # allow_lower с допуском 5%
-        assert compare_spec_values(200, 195, "power", allow_lower=True) is True
-        assert compare_spec_values(200, 180, "power", allow_lower=True) is False
+        assert compare_spec_values(200, 195, allow_lower=True) is True
+        assert compare_spec_values(200, 180, allow_lower=True) is False
 
     @pytest.mark.asyncio
     async def test_match_percentage_calculation(self, sample_requirements):
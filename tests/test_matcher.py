@@ -3,7 +3,9 @@
 import pytest
 
 from services.matcher import (
-    _parse_version_priority,
+    _compile_required_specs,
+    _normalize_text,
+    _numeric_match_matrix,
     calculate_match_percentage,
     categorize_matches,
     compare_spec_values,
@@ -15,59 +17,6 @@ from services.matcher import (
 from tests.conftest import make_model
 
 
-# ════════════════════════════════════════════════════════════════
-# _parse_version_priority
-# ════════════════════════════════════════════════════════════════
-
-
-class TestParseVersionPriority:
-    def test_finalUPD_with_version(self):
-        assert _parse_version_priority("ESR-3100_finalUPDv.1.2.csv") == 1002
-
-    def test_finalUPD_v1_1(self):
-        assert _parse_version_priority("ESR-3100_finalUPDv.1.1.csv") == 1001
-
-    def test_finalUPD_without_version(self):
-        assert _parse_version_priority("ESR-3100_finalUPD.csv") == 1000
-
-    def test_v33(self):
-        assert _parse_version_priority("ESR-3100_v33.csv") == 33
-
-    def test_v21(self):
-        assert _parse_version_priority("MES3710P_v21.csv") == 21
-
-    def test_v20(self):
-        assert _parse_version_priority("MES3710P_v20.csv") == 20
-
-    def test_v21_1(self):
-        # vNN.M — основной приоритет по NN
-        assert _parse_version_priority("ESR-3100_v21.1.csv") == 21
-
-    def test_new_suffix_bonus(self):
-        assert _parse_version_priority("MES3710P_v20_new.csv") == 20.5
-
-    def test_new_suffix_with_finalUPD(self):
-        assert _parse_version_priority("ESR_finalUPD_new.csv") == 1000.5
-
-    def test_no_version(self):
-        assert _parse_version_priority("MES3710P.csv") == 0
-
-    def test_empty_string(self):
-        assert _parse_version_priority("") == 0
-
-    def test_none_source(self):
-        assert _parse_version_priority(None) == 0
-
-    def test_ordering_finalUPD_gt_v21(self):
-        assert _parse_version_priority("finalUPD.csv") > _parse_version_priority("v21.csv")
-
-    def test_ordering_v21_gt_v20(self):
-        assert _parse_version_priority("v21.csv") > _parse_version_priority("v20.csv")
-
-    def test_ordering_v20_gt_no_version(self):
-        assert _parse_version_priority("v20.csv") > _parse_version_priority("plain.csv")
-
-
 # ════════════════════════════════════════════════════════════════
 # deduplicate_models
 # ════════════════════════════════════════════════════════════════
@@ -153,6 +102,17 @@ class TestDeduplicateModels:
         # Should pick the one with more specs + higher version
         assert len(result[0].specifications) == 2
 
+    def test_first_seen_order_and_tie_keeps_first(self):
+        spec = {"a": 1}
+        models = [
+            make_model("B", source_file="v20.csv", specifications=spec, model_id=1),
+            make_model("A", source_file="v20.csv", specifications=spec, model_id=2),
+            make_model("B", source_file="v20.csv", specifications=spec, model_id=3),
+            make_model("A", source_file="v21.csv", specifications=spec, model_id=4),
+        ]
+        result = deduplicate_models(models)
+        assert [m.id for m in result] == [1, 4]
+
 
 # ════════════════════════════════════════════════════════════════
 # compare_spec_values
@@ -162,68 +122,119 @@ class TestDeduplicateModels:
 class TestCompareSpecValues:
     # Boolean tests
     def test_bool_true_match(self):
-        assert compare_spec_values(True, True, "support_ospf") is True
+        assert compare_spec_values(True, True) is True
 
     def test_bool_false_match(self):
-        assert compare_spec_values(False, False, "support_ospf") is True
+        assert compare_spec_values(False, False) is True
 
     def test_bool_mismatch(self):
-        assert compare_spec_values(True, False, "support_ospf") is False
+        assert compare_spec_values(True, False) is False
 
     def test_bool_truthy_int(self):
-        assert compare_spec_values(True, 1, "support_ospf") is True
+        assert compare_spec_values(True, 1) is True
 
     # Numeric tests
     def test_numeric_equal(self):
-        assert compare_spec_values(24, 24, "ports_1g") is True
+        assert compare_spec_values(24, 24) is True
 
     def test_numeric_model_higher(self):
-        assert compare_spec_values(24, 48, "ports_1g") is True
+        assert compare_spec_values(24, 48) is True
 
     def test_numeric_model_lower_strict(self):
-        assert compare_spec_values(24, 20, "ports_1g") is False
+        assert compare_spec_values(24, 20) is False
 
     def test_numeric_allow_lower_within_threshold(self):
         # 95% of 100 = 95, so 96 should pass
-        assert compare_spec_values(100, 96, "power_watt", allow_lower=True) is True
+        assert compare_spec_values(100, 96, allow_lower=True) is True
 
     def test_numeric_allow_lower_below_threshold(self):
         # 95% of 100 = 95, so 90 should fail
-        assert compare_spec_values(100, 90, "power_watt", allow_lower=True) is False
+        assert compare_spec_values(100, 90, allow_lower=True) is False
 
     def test_numeric_float(self):
-        assert compare_spec_values(10.5, 10.5, "weight") is True
+        assert compare_spec_values(10.5, 10.5) is True
 
     def test_numeric_float_higher(self):
-        assert compare_spec_values(10.0, 12.5, "weight") is True
+        assert compare_spec_values(10.0, 12.5) is True
 
     # String tests
     def test_string_exact_match(self):
-        assert compare_spec_values("Layer 3", "Layer 3", "type") is True
+        assert compare_spec_values("Layer 3", "Layer 3") is True
 
     def test_string_case_insensitive(self):
-        assert compare_spec_values("Layer 3", "layer 3", "type") is True
+        assert compare_spec_values("Layer 3", "layer 3") is True
 
     def test_string_whitespace(self):
-        assert compare_spec_values("Layer 3", "  Layer 3  ", "type") is True
+        assert compare_spec_values("Layer 3", "  Layer 3  ") is True
 
     def test_string_mismatch(self):
-        assert compare_spec_values("Layer 3", "Layer 2", "type") is False
+        assert compare_spec_values("Layer 3", "Layer 2") is False
 
     # None / missing
     def test_model_value_none(self):
-        assert compare_spec_values(24, None, "ports") is False
+        assert compare_spec_values(24, None) is False
 
     def test_both_none(self):
         # required_value is not None check is not done, model_value=None → False
-        assert compare_spec_values(None, None, "x") is False
+        assert compare_spec_values(None, None) is False
 
     # Mixed types
     def test_fallback_equality(self):
-        assert compare_spec_values([1, 2], [1, 2], "list_field") is True
+        assert compare_spec_values([1, 2], [1, 2]) is True
 
     def test_fallback_inequality(self):
-        assert compare_spec_values([1, 2], [1, 3], "list_field") is False
+        assert compare_spec_values([1, 2], [1, 3]) is False
+
+
+class TestCompileRequiredSpecs:
+    REQUIRED = {
+        "poe": True,
+        "ports": ">=24",
+        "power": 200,
+        "type": "Управляемый",
+        "layer": "L3",
+        "list": [1, 2],
+    }
+    MODEL_VALUES = [True, False, 0, 24, 48, "48", 195, "Управляемый", "l3", "нет", [1, 2]]
+
+    def test_order_and_values_preserved(self):
+        compiled = _compile_required_specs(self.REQUIRED)
+        assert [(k, v) for k, v, _ in compiled] == list(self.REQUIRED.items())
+
+    @pytest.mark.parametrize("value", [">=24", "<=24", "=24", 24, "до 24", "Да", True, [1]])
+    def test_equal_value_matches(self, value):
+        assert compare_spec_values(value, value) is True
+
+    @pytest.mark.parametrize("value", [">24", "<24", "!=24", "≠24"])
+    def test_equal_value_with_strict_operator_fails(self, value):
+        assert compare_spec_values(value, value) is False
+
+    def test_equal_negative_with_allow_lower_uses_full_comparison(self):
+        # -40 >= -40 * 0.95 ложно — равенство не должно давать совпадение
+        assert compare_spec_values(-40, -40, allow_lower=True) is False
+        assert compare_spec_values(-40, -40) is True
+
+    @pytest.mark.parametrize("allow_lower", [False, True])
+    def test_same_as_compare_spec_values(self, allow_lower):
+        for key, required_value, comparator in _compile_required_specs(
+            self.REQUIRED, allow_lower
+        ):
+            for model_value in self.MODEL_VALUES:
+                assert comparator(model_value) == compare_spec_values(
+                    required_value, model_value, allow_lower
+                ), (key, model_value)
+
+    def test_subclass_values_use_generic_dispatch(self):
+        class Text(str):
+            pass
+
+        class Number(int):
+            pass
+
+        assert compare_spec_values(Text(">=24"), 48) is True
+        assert compare_spec_values(Text("Управляемый"), "управляемый") is True
+        assert compare_spec_values(Number(24), "48") is True
+        assert compare_spec_values(Number(24), 12) is False
 
 
 # ════════════════════════════════════════════════════════════════
@@ -285,6 +296,14 @@ class TestCalculateMatchPercentage:
         result = calculate_match_percentage(required, model, allow_lower=True)
         assert result["match_percentage"] == 100.0
 
+    def test_compiled(self):
+        required = {"ports_1g": ">=24", "type": "L3"}
+        compiled = _compile_required_specs(required)
+        model = {"ports_1g": 48, "type": "L2"}
+        result = calculate_match_percentage(required, model, compiled=compiled)
+        assert result["match_percentage"] == 50.0
+        assert result["different_specs"] == {"type": ("L3", "L2")}
+
 
 # ════════════════════════════════════════════════════════════════
 # categorize_matches
@@ -354,6 +373,30 @@ class TestCategorizeMatches:
         assert len(result["partial"]) == 1
         assert len(result["not_matched"]) == 1
 
+    def test_equal_percentages_keep_input_order(self):
+        matches = [
+            self._match("C", 80.0),
+            self._match("A", 40.0),
+            self._match("B", 80.0),
+            self._match("D", 40.0),
+        ]
+        result = categorize_matches(matches)
+        assert [m["model_name"] for m in result["partial"]] == ["C", "B"]
+        assert [m["model_name"] for m in result["not_matched"]] == ["A", "D"]
+
+    def test_limit_keeps_top_results(self):
+        matches = [self._match(str(i), float(70 + i)) for i in range(10)]
+        matches += [self._match(f"n{i}", float(i)) for i in range(5)]
+        result = categorize_matches(matches, limit=3)
+        assert [m["match_percentage"] for m in result["partial"]] == [79.0, 78.0, 77.0]
+        assert [m["match_percentage"] for m in result["not_matched"]] == [4.0, 3.0, 2.0]
+
+    def test_threshold_above_100(self):
+        matches = [self._match("A", 100.0), self._match("B", 99.0)]
+        result = categorize_matches(matches, threshold=101)
+        assert [m["model_name"] for m in result["ideal"]] == ["A"]
+        assert [m["model_name"] for m in result["not_matched"]] == ["B"]
+
 
 # ════════════════════════════════════════════════════════════════
 # extract_number_with_operator
@@ -459,60 +502,60 @@ class TestExtractNumberWithOperator:
 class TestCompareSpecValuesWithOperators:
     def test_le_operator_model_below(self):
         # ≤ 100: модель с 80 → True
-        assert compare_spec_values("<=100", 80, "power_watt") is True
+        assert compare_spec_values("<=100", 80) is True
 
     def test_le_operator_model_equal(self):
         # ≤ 100: модель с 100 → True
-        assert compare_spec_values("<=100", 100, "power_watt") is True
+        assert compare_spec_values("<=100", 100) is True
 
     def test_le_operator_model_above(self):
         # ≤ 100: модель с 120 → False
-        assert compare_spec_values("<=100", 120, "power_watt") is False
+        assert compare_spec_values("<=100", 120) is False
 
     def test_ge_operator_model_above(self):
         # >= 24: модель с 48 → True
-        assert compare_spec_values(">=24", 48, "ports_1g") is True
+        assert compare_spec_values(">=24", 48) is True
 
     def test_ge_operator_model_below(self):
         # >= 24: модель с 12 → False
-        assert compare_spec_values(">=24", 12, "ports_1g") is False
+        assert compare_spec_values(">=24", 12) is False
 
     def test_eq_operator_match(self):
-        assert compare_spec_values("=10", 10, "vlan_count") is True
+        assert compare_spec_values("=10", 10) is True
 
     def test_eq_operator_mismatch(self):
-        assert compare_spec_values("=10", 11, "vlan_count") is False
+        assert compare_spec_values("=10", 11) is False
 
     def test_gt_operator(self):
-        assert compare_spec_values(">5", 6, "x") is True
-        assert compare_spec_values(">5", 5, "x") is False
+        assert compare_spec_values(">5", 6) is True
+        assert compare_spec_values(">5", 5) is False
 
     def test_lt_operator(self):
-        assert compare_spec_values("<50", 49, "x") is True
-        assert compare_spec_values("<50", 50, "x") is False
+        assert compare_spec_values("<50", 49) is True
+        assert compare_spec_values("<50", 50) is False
 
     def test_le_allow_lower_tolerance(self):
         # ≤ 100 with allow_lower: 105% = 105, model 104 → True
-        assert compare_spec_values("<=100", 104, "power_watt", allow_lower=True) is True
+        assert compare_spec_values("<=100", 104, allow_lower=True) is True
 
     def test_le_allow_lower_too_high(self):
         # ≤ 100 with allow_lower: 105% = 105, model 110 → False
-        assert compare_spec_values("<=100", 110, "power_watt", allow_lower=True) is False
+        assert compare_spec_values("<=100", 110, allow_lower=True) is False
 
     def test_backward_compat_plain_number(self):
         # Без оператора — дефолт >=, как и раньше
-        assert compare_spec_values(24, 24, "ports") is True
-        assert compare_spec_values(24, 48, "ports") is True
-        assert compare_spec_values(24, 12, "ports") is False
+        assert compare_spec_values(24, 24) is True
+        assert compare_spec_values(24, 48) is True
+        assert compare_spec_values(24, 12) is False
 
     def test_unicode_le_string(self):
         # Unicode ≤ в строке
-        assert compare_spec_values("≤100", 80, "power") is True
-        assert compare_spec_values("≤100", 120, "power") is False
+        assert compare_spec_values("≤100", 80) is True
+        assert compare_spec_values("≤100", 120) is False
 
     def test_unicode_ge_string(self):
-        assert compare_spec_values("≥24", 24, "ports") is True
-        assert compare_spec_values("≥24", 12, "ports") is False
+        assert compare_spec_values("≥24", 24) is True
+        assert compare_spec_values("≥24", 12) is False
 
 
 # ════════════════════════════════════════════════════════════════
@@ -521,6 +564,12 @@ class TestCompareSpecValuesWithOperators:
 
 
 class TestCompareTextValues:
+    def test_normalize_text(self):
+        text, words, parts = _normalize_text("  SSH, Telnet/HTTP ")
+        assert text == "ssh, telnet/http"
+        assert words == {"ssh", "telnet", "http"}
+        assert parts == {"ssh", "telnet/http"}
+
     def test_exact_match(self):
         assert compare_text_values("Layer 3", "Layer 3") is True
 
@@ -568,13 +617,13 @@ class TestCompareTextValues:
 class TestCompareSpecValuesText:
     def test_partial_match_via_compare_spec(self):
         # "Управляемый" should match "Управляемый L3" through compare_text_values
-        assert compare_spec_values("Управляемый", "Управляемый L3", "type") is True
+        assert compare_spec_values("Управляемый", "Управляемый L3") is True
 
     def test_boolean_synonym_via_compare_spec(self):
-        assert compare_spec_values("Да", "Есть", "feature") is True
+        assert compare_spec_values("Да", "Есть") is True
 
     def test_string_mismatch_still_fails(self):
-        assert compare_spec_values("Layer 3", "Layer 2", "type") is False
+        assert compare_spec_values("Layer 3", "Layer 2") is False
 
 
 # ════════════════════════════════════════════════════════════════
@@ -615,3 +664,58 @@ class TestCalculateMatchPercentageUnmapped:
         assert "ports_1g" in result["matched_specs"]
         assert "missing_key" in result["unmapped_specs"]
         assert "power_watt" in result["different_specs"]
+
+    def test_no_common_keys_keeps_requirement_order(self):
+        result = calculate_match_percentage({"b": 1, "a": 2}, {"c": 1, "d": None})
+        assert result["match_percentage"] == 0.0
+        assert result["unmapped_specs"] == ["b", "a"]
+        assert result["missing_specs"] == ["b", "a"]
+
+
+# ════════════════════════════════════════════════════════════════
+# _numeric_match_matrix (пакетное сравнение через NumPy)
+# ════════════════════════════════════════════════════════════════
+
+
+class TestNumericMatchMatrix:
+    def _candidates(self):
+        return [
+            {"ports": 24, "power": "150 Вт"},
+            {"ports": "12", "power": 300},
+            {"ports": "нет данных"},
+        ]
+
+    def test_only_numeric_keys_are_batched(self):
+        required = {"ports": ">=24", "power": "<=200", "poe": True, "type": "Управляемый"}
+        keys, matched, resolved, _ = _numeric_match_matrix(required, self._candidates())
+        assert keys == ["ports", "power"]
+        assert matched.shape == (3, 2)
+
+    def test_matches_python_path(self):
+        required = {"ports": ">=24", "power": "<=200"}
+        candidates = self._candidates()
+        keys, matched, resolved, _ = _numeric_match_matrix(required, candidates)
+        for i, specs in enumerate(candidates):
+            for j, key in enumerate(keys):
+                if resolved[i, j]:
+                    expected = compare_spec_values(required[key], specs[key])
+                    assert bool(matched[i, j]) is expected
+
+    def test_unresolved_cells(self):
+        required = {"ports": 24, "power": 100}
+        keys, matched, resolved, needs_python = _numeric_match_matrix(
+            required, self._candidates()
+        )
+        # "нет данных" и отсутствующий power у модели C не разрешены матрицей
+        assert resolved[2].tolist() == [False, False]
+        assert not matched[2].any()
+        # ...но в Python сравнивается только текст; отсутствующее значение — нет
+        assert needs_python[2].tolist() == [True, False]
+        assert not needs_python[:2].any()
+
+    def test_allow_lower(self):
+        required = {"ports": 25}
+        keys, matched, _, _ = _numeric_match_matrix(
+            required, self._candidates(), allow_lower=True
+        )
+        assert matched[0, 0]  # 24 >= 25 * 0.95
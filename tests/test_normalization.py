@@ -0,0 +1,100 @@
+"""Tests for services/normalization.py (lazy shared normalization map, version priority)."""
+
+import json
+
+import pytest
+
+from services import normalization
+
+
+def _clear_caches():
+    normalization._load_canonical_keys.cache_clear()
+    normalization.get_canonical_keys.cache_clear()
+    normalization.get_variant_map.cache_clear()
+
+
+@pytest.fixture
+def norm_map(tmp_path, monkeypatch):
+    path = tmp_path / "normalization_map.json"
+    path.write_text(json.dumps({"canonical_keys": {
+        "ports_1g_rj45": ["Количество портов", " Порты 1G RJ-45 "],
+        "power_supply": ["Питание"],
+    }}, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(normalization, "NORMALIZATION_MAP_PATH", str(path))
+    _clear_caches()
+    yield path
+    _clear_caches()
+
+
+class TestNormalizationMap:
+    def test_canonical_keys_in_file_order(self, norm_map):
+        assert normalization.get_canonical_keys() == ("ports_1g_rj45", "power_supply")
+
+    def test_variant_map_casefolded(self, norm_map):
+        variant_map = normalization.get_variant_map()
+        assert variant_map["количество портов"] == "ports_1g_rj45"
+        assert variant_map["порты 1g rj-45"] == "ports_1g_rj45"
+        with pytest.raises(TypeError):
+            variant_map["питание"] = "other"
+
+    def test_file_read_once(self, norm_map):
+        normalization.get_canonical_keys()
+        norm_map.unlink()
+        assert normalization.get_variant_map()["питание"] == "power_supply"
+
+    def test_missing_file_gives_empty_map(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(normalization, "NORMALIZATION_MAP_PATH", str(tmp_path / "missing.json"))
+        _clear_caches()
+        try:
+            assert normalization.get_canonical_keys() == ()
+            assert dict(normalization.get_variant_map()) == {}
+        finally:
+            _clear_caches()
+
+
+class TestParseVersionPriority:
+    def test_finalUPD_with_version(self):
+        assert normalization.parse_version_priority("ESR-3100_finalUPDv.1.2.csv") == 1002
+
+    def test_finalUPD_v1_1(self):
+        assert normalization.parse_version_priority("ESR-3100_finalUPDv.1.1.csv") == 1001
+
+    def test_finalUPD_without_version(self):
+        assert normalization.parse_version_priority("ESR-3100_finalUPD.csv") == 1000
+
+    def test_v33(self):
+        assert normalization.parse_version_priority("ESR-3100_v33.csv") == 33
+
+    def test_v21(self):
+        assert normalization.parse_version_priority("MES3710P_v21.csv") == 21
+
+    def test_v20(self):
+        assert normalization.parse_version_priority("MES3710P_v20.csv") == 20
+
+    def test_v21_1(self):
+        # vNN.M — основной приоритет по NN
+        assert normalization.parse_version_priority("ESR-3100_v21.1.csv") == 21
+
+    def test_new_suffix_bonus(self):
+        assert normalization.parse_version_priority("MES3710P_v20_new.csv") == 20.5
+
+    def test_new_suffix_with_finalUPD(self):
+        assert normalization.parse_version_priority("ESR_finalUPD_new.csv") == 1000.5
+
+    def test_no_version(self):
+        assert normalization.parse_version_priority("MES3710P.csv") == 0
+
+    def test_empty_string(self):
+        assert normalization.parse_version_priority("") == 0
+
+    def test_none_source(self):
+        assert normalization.parse_version_priority(None) == 0
+
+    def test_ordering_finalUPD_gt_v21(self):
+        assert normalization.parse_version_priority("finalUPD.csv") > normalization.parse_version_priority("v21.csv")
+
+    def test_ordering_v21_gt_v20(self):
+        assert normalization.parse_version_priority("v21.csv") > normalization.parse_version_priority("v20.csv")
+
+    def test_ordering_v20_gt_no_version(self):
+        assert normalization.parse_version_priority("v20.csv") > normalization.parse_version_priority("plain.csv")
@@ -20,7 +20,13 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from services.matcher import compare_spec_values, extract_number, extract_number_with_operator
+from services.matcher import (
+    _extract_number_from_str,
+    _extract_number_with_operator_from_str,
+    compare_spec_values,
+    extract_number,
+    extract_number_with_operator,
+)
 
 
 class TestSimpleNumbers:
@@ -38,6 +44,17 @@ class TestSimpleNumbers:
     def test_zero(self):
         assert extract_number(0) == 0.0
 
+    def test_plain_number_strings(self):
+        assert extract_number("24") == 24.0
+        assert extract_number("2,5") == 2.5
+        assert extract_number("-40") == -40.0
+
+    def test_float_literals_not_accepted(self):
+        # float() понимает эти строки, extract_number — нет
+        assert extract_number("nan") is None
+        assert extract_number("inf") is None
+        assert extract_number("1e5") == 1.0
+
 
 class TestStringsWithUnits:
     """Тесты для строк с единицами измерения."""
@@ -167,6 +184,28 @@ class TestEdgeCases:
     def test_boolean_false(self):
         assert extract_number(False) is None
 
+    def test_string_results_cached(self):
+        extract_number("48 портов")
+        hits = _extract_number_from_str.cache_info().hits
+        assert extract_number("48 портов") == 48.0
+        assert _extract_number_from_str.cache_info().hits == hits + 1
+
+    def test_unhashable_value(self):
+        assert extract_number([24]) is None
+
+    @pytest.mark.parametrize("value, expected", [
+        ("версия 1.2.3", 1.2),
+        ("24. порта", 24.0),
+        ("шаг .5 мм", 0.5),
+        ("IP 10..20", 10.0),
+    ])
+    def test_number_inside_text(self, value, expected):
+        assert extract_number(value) == expected
+
+    def test_long_digit_string(self):
+        # Серийный номер: без якоря (?<!\d) поиск диапазона был квадратичным
+        assert extract_number("SN " + "1" * 5000 + "-x по") == float("1" * 5000)
+
 
 class TestExtractNumberWithOperator:
     """Тесты для extract_number_with_operator()."""
@@ -243,59 +282,65 @@ class TestExtractNumberWithOperator:
         num, op = extract_number_with_operator("максимум 200")
         assert num == 200.0 and op == "<="
 
+    def test_string_results_cached(self):
+        extract_number_with_operator("≥ 16 портов")
+        hits = _extract_number_with_operator_from_str.cache_info().hits
+        assert extract_number_with_operator("≥ 16 портов") == (16.0, ">=")
+        assert _extract_number_with_operator_from_str.cache_info().hits == hits + 1
+
 
 class TestCompareSpecValues:
     """Интеграционные тесты для compare_spec_values с числовыми значениями."""
 
     def test_equal_integers(self):
-        result = compare_spec_values(24, 24, "ports", allow_lower=False)
+        result = compare_spec_values(24, 24, allow_lower=False)
         assert result is True
 
     def test_model_greater(self):
-        result = compare_spec_values(24, 30, "ports", allow_lower=False)
+        result = compare_spec_values(24, 30, allow_lower=False)
         assert result is True
 
     def test_model_lower(self):
-        result = compare_spec_values(24, 20, "ports", allow_lower=False)
+        result = compare_spec_values(24, 20, allow_lower=False)
         assert result is False
 
     def test_strings_with_numbers_equal(self):
-        result = compare_spec_values("24 порта", "24", "ports", allow_lower=False)
+        result = compare_spec_values("24 порта", "24", allow_lower=False)
         assert result is True
 
     def test_strings_with_numbers_greater(self):
-        result = compare_spec_values("24 порта", "30 портов", "ports", allow_lower=False)
+        result = compare_spec_values("24 порта", "30 портов", allow_lower=False)
         assert result is True
 
     def test_allow_lower_within_threshold(self):
         # 190 >= 200 * 0.95 (190) - должно пройти
-        result = compare_spec_values(200, 190, "power", allow_lower=True)
+        result = compare_spec_values(200, 190, allow_lower=True)
         assert result is True
 
     def test_allow_lower_below_threshold(self):
         # 180 < 200 * 0.95 (190) - не должно пройти
-        result = compare_spec_values(200, 180, "power", allow_lower=True)
+        result = compare_spec_values(200, 180, allow_lower=True)
         assert result is False
 
     def test_range_extraction(self):
-        result = compare_spec_values("10-20", 25, "range", allow_lower=False)
+        result = compare_spec_values("10-20", 25, allow_lower=False)
         assert result is True  # model (25) >= required max (20)
 
     def test_multiplication_extraction(self):
-        result = compare_spec_values("2x4", 10, "calc", allow_lower=False)
+        result = compare_spec_values("2x4", 10, allow_lower=False)
         assert result is True  # model (10) >= required (8)
 
     def test_le_operator_model_below(self):
         # ≤ 100: модель с 80 → True
-        assert compare_spec_values("<=100", 80, "power") is True
+        assert compare_spec_values("<=100", 80) is True
 
     def test_le_operator_model_above(self):
         # ≤ 100: модель с 120 → False
-        assert compare_spec_values("<=100", 120, "power") is False
+        assert compare_spec_values("<=100", 120) is False
 
     def test_ge_operator(self):
-        assert compare_spec_values(">=24", 24, "ports") is True
-        assert compare_spec_values(">=24", 12, "ports") is False
+        assert compare_spec_values(">=24", 24) is True
+        assert compare_spec_values(">=24", 12) is False
 
 
 if __name__ == "__main__":
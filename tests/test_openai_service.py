@@ -0,0 +1,239 @@
+"""Tests for services/openai_service.py (OpenAI client is mocked)."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services import openai_service
+
+
+@pytest.fixture(autouse=True)
+def _clear_response_cache():
+    openai_service._response_cache.clear()
+    yield
+    openai_service._response_cache.clear()
+
+
+def _response(content, finish_reason="stop"):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    response.choices[0].finish_reason = finish_reason
+    return response
+
+
+class TestCreateCompletion:
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_bounded(self):
+        in_flight = 0
+        peak = 0
+
+        async def fake_create(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return kwargs["model"]
+
+        with patch.object(openai_service, "_request_slots", asyncio.Semaphore(2)), \
+                patch.object(openai_service.client.chat.completions, "create", fake_create):
+            results = await asyncio.gather(
+                *(openai_service._create_completion(model=str(i)) for i in range(5))
+            )
+
+        assert results == ["0", "1", "2", "3", "4"]
+        assert peak == 2
+
+
+class TestPromptCaching:
+    @pytest.mark.asyncio
+    async def test_router_and_parser_send_cache_keys(self):
+        create = AsyncMock(side_effect=[_response("ТЗ"), _response('{"items": []}')])
+        with patch.object(openai_service.client.chat.completions, "create", create), \
+                patch.object(openai_service.settings, "router_skip_chars", 0):
+            await openai_service.process_document("Документ")
+
+        router_kwargs, parser_kwargs = (c.kwargs for c in create.await_args_list)
+        assert router_kwargs["extra_body"] == {"prompt_cache_key": "router_v1"}
+        assert parser_kwargs["extra_body"] == {"prompt_cache_key": "parser_v2"}
+
+    @pytest.mark.asyncio
+    async def test_variable_text_comes_last(self):
+        create = AsyncMock(side_effect=[_response('{"items": []}')] * 2)
+        with patch.object(openai_service.client.chat.completions, "create", create):
+            await openai_service.parse_requirements("первое ТЗ")
+            await openai_service.parse_requirements("второе ТЗ")
+
+        first, second = (c.kwargs["messages"][0]["content"] for c in create.await_args_list)
+        assert first.endswith("первое ТЗ") and second.endswith("второе ТЗ")
+        assert first[:-len("первое ТЗ")] == second[:-len("второе ТЗ")]
+
+
+class TestRouterShortCircuit:
+    @pytest.mark.asyncio
+    async def test_short_document_skips_router(self):
+        create = AsyncMock(return_value=_response('{"items": []}'))
+        with patch.object(openai_service.client.chat.completions, "create", create), \
+                patch.object(openai_service.settings, "router_skip_chars", 8000):
+            await openai_service.process_document("Коммутатор 24 порта")
+
+        assert create.await_count == 1
+        assert create.await_args.kwargs["model"] == openai_service.settings.openai_model
+        assert create.await_args.kwargs["messages"][0]["content"].endswith("Коммутатор 24 порта")
+
+    @pytest.mark.asyncio
+    async def test_heading_near_top_skips_router(self):
+        text = "Договор поставки\n" + "ТЕХНИЧЕСКИЕ ТРЕБОВАНИЯ\n" + "Порты: 24\n" * 2000
+        create = AsyncMock(return_value=_response('{"items": []}'))
+        with patch.object(openai_service.client.chat.completions, "create", create), \
+                patch.object(openai_service.settings, "router_skip_chars", 8000):
+            await openai_service.process_document(text)
+
+        assert create.await_count == 1
+        prompt = create.await_args.kwargs["messages"][0]["content"]
+        assert "Договор поставки" not in prompt and "ТЕХНИЧЕСКИЕ ТРЕБОВАНИЯ\nПорты" in prompt
+
+    @pytest.mark.asyncio
+    async def test_zero_skip_chars_always_uses_router(self):
+        text = "ТЕХНИЧЕСКИЕ ТРЕБОВАНИЯ\n" + "Порты: 24\n" * 2000
+        create = AsyncMock(side_effect=[_response("ТЗ"), _response('{"items": []}')])
+        with patch.object(openai_service.client.chat.completions, "create", create), \
+                patch.object(openai_service.settings, "router_skip_chars", 0):
+            assert openai_service._find_tech_section_locally(text) is None
+            await openai_service.process_document(text)
+
+        assert create.await_count == 2
+        assert create.await_args_list[0].kwargs["model"] == openai_service.settings.openai_router_model
+
+    @pytest.mark.parametrize("text", [
+        # Упоминание внутри предложения, а не заголовок
+        "Поставщик обязан соблюдать технические требования.\n" + "Порты: 24\n" * 2000,
+        # Оглавление: заголовок встречается ещё раз ниже
+        "Содержание\nТехнические требования\n" + "Условия\n" * 100
+        + "Технические требования\n" + "Порты: 24\n" * 2000,
+        # Слишком длинный хвост для Parser
+        "ТЕХНИЧЕСКИЕ ТРЕБОВАНИЯ\n" + "Порты: 24\n" * 5000,
+    ])
+    def test_ambiguous_heading_needs_router(self, text):
+        with patch.object(openai_service.settings, "router_skip_chars", 8000):
+            assert openai_service._find_tech_section_locally(text) is None
+
+    @pytest.mark.asyncio
+    async def test_long_document_without_heading_uses_router(self):
+        create = AsyncMock(side_effect=[_response("ТЗ"), _response('{"items": []}')])
+        with patch.object(openai_service.client.chat.completions, "create", create), \
+                patch.object(openai_service.settings, "router_skip_chars", 8000):
+            await openai_service.process_document("Условия договора\n" * 1000)
+
+        assert create.await_count == 2
+
+
+class TestStructuredOutput:
+    @pytest.mark.asyncio
+    async def test_spec_pairs_folded_into_dict(self):
+        content = json.dumps({"items": [{
+            "item_name": "Коммутатор доступа",
+            "quantity": 2,
+            "model_name": None,
+            "category": "Коммутаторы",
+            "required_specs": [
+                {"key": "ports_1g_rj45", "value": ">=24"},
+                {"key": "poe_support", "value": True},
+            ],
+        }]}, ensure_ascii=False)
+        create = AsyncMock(return_value=_response(content))
+        with patch.object(openai_service.client.chat.completions, "create", create):
+            result = await openai_service.parse_requirements("ТЗ")
+
+        assert create.await_args.kwargs["response_format"]["type"] == "json_schema"
+        assert result["items"][0]["required_specs"] == {"ports_1g_rj45": ">=24", "poe_support": True}
+
+    @pytest.mark.asyncio
+    async def test_truncated_json_reported(self):
+        create = AsyncMock(return_value=_response('{"items": [{"item_name": "Комм'))
+        with patch.object(openai_service.client.chat.completions, "create", create):
+            result = await openai_service.parse_requirements("ТЗ")
+
+        assert result["items"] == [] and "error" in result
+
+
+class TestResponseCache:
+    @pytest.mark.asyncio
+    async def test_same_document_served_from_cache(self):
+        create = AsyncMock(side_effect=[_response("ТЗ"), _response('{"items": []}')])
+        with patch.object(openai_service.client.chat.completions, "create", create), \
+                patch.object(openai_service.settings, "router_skip_chars", 0), \
+                patch.object(openai_service.settings, "openai_cache_ttl", 60):
+            first = await openai_service.process_document("Документ")
+            second = await openai_service.process_document("Документ")
+
+        assert create.await_count == 2
+        assert first == second and first is not second
+
+    @pytest.mark.asyncio
+    async def test_ttl_zero_disables_cache(self):
+        create = AsyncMock(return_value=_response('{"items": []}'))
+        with patch.object(openai_service.client.chat.completions, "create", create), \
+                patch.object(openai_service.settings, "openai_cache_ttl", 0):
+            await openai_service.parse_requirements("ТЗ")
+            await openai_service.parse_requirements("ТЗ")
+
+        assert create.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalid_json_not_cached(self):
+        create = AsyncMock(side_effect=[_response('{"items": ['), _response('{"items": []}')])
+        with patch.object(openai_service.client.chat.completions, "create", create), \
+                patch.object(openai_service.settings, "openai_cache_ttl", 60):
+            assert "error" in await openai_service.parse_requirements("ТЗ")
+            assert await openai_service.parse_requirements("ТЗ") == {"items": []}
+
+        assert create.await_count == 2
+
+    def test_oldest_entry_evicted(self):
+        with patch.object(openai_service, "_RESPONSE_CACHE_MAX_ENTRIES", 2), \
+                patch.object(openai_service.settings, "openai_cache_ttl", 60):
+            for key in (b"a", b"b", b"c"):
+                openai_service._put_cached_response(key, key.decode())
+
+        assert list(openai_service._response_cache) == [b"b", b"c"]
+
+
+class TestOutputTokenBudget:
+    @pytest.mark.parametrize("length, expected", [(100, 4_096), (10_000, 5_000), (100_000, 8_000)])
+    def test_parser_budget_scales_with_input(self, length, expected):
+        assert openai_service._output_token_budget("ы" * length, openai_service._PARSER_MAX_TOKENS) == expected
+
+    @pytest.mark.asyncio
+    async def test_budget_passed_as_max_tokens(self):
+        create = AsyncMock(side_effect=[_response("ТЗ"), _response('{"items": []}')])
+        with patch.object(openai_service.client.chat.completions, "create", create), \
+                patch.object(openai_service.settings, "router_skip_chars", 0):
+            await openai_service.process_document("Документ")
+
+        router_kwargs, parser_kwargs = (c.kwargs for c in create.await_args_list)
+        assert router_kwargs["max_tokens"] == 1_024
+        assert parser_kwargs["max_tokens"] == 4_096
+
+    @pytest.mark.asyncio
+    async def test_cut_off_output_retried_with_ceiling(self):
+        create = AsyncMock(side_effect=[
+            _response('{"items": [{"item_name": "Комм', finish_reason="length"),
+            _response('{"items": []}'),
+        ])
+        with patch.object(openai_service.client.chat.completions, "create", create):
+            result = await openai_service.parse_requirements("ТЗ")
+
+        assert result == {"items": []}
+        assert [c.kwargs["max_tokens"] for c in create.await_args_list] == [4_096, 8_000]
+
+    @pytest.mark.asyncio
+    async def test_cut_off_at_ceiling_not_retried(self):
+        create = AsyncMock(return_value=_response('{"items": [', finish_reason="length"))
+        with patch.object(openai_service.client.chat.completions, "create", create):
+            result = await openai_service.parse_requirements("ы" * 20_000)
+
+        assert create.await_count == 1
+        assert result["items"] == [] and "error" in result
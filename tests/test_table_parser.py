@@ -0,0 +1,143 @@
+"""Unit тесты для services/table_parser.py (разбор значений и таблиц ТЗ)."""
+
+import pytest
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+
+from services import table_parser
+from services.table_parser import (
+    _group_requirements_by_item,
+    _infer_category,
+    _match_any_pattern,
+    _parse_table_rows,
+    _table_cells,
+    _VALUE_PATTERN,
+    parse_value,
+)
+
+
+class TestParseValue:
+    @pytest.mark.parametrize("value, expected", [
+        ("Да", True),
+        ("нет", False),
+        ("24", 24),
+        ("0024", 24),
+        ("²", "²"),
+        ("1.5", 1.5),
+        ("≥ 24", ">=24"),
+        ("<=100", "<=100"),
+        ("не менее 8", ">=8"),
+        ("НЕ БОЛЕЕ 9", "<=9"),
+        ("до 100", "<=100"),
+        ("Управляемый", "Управляемый"),
+        ("", None),
+    ])
+    def test_values(self, value, expected):
+        result = parse_value(value)
+        assert result == expected and type(result) is type(expected)
+
+
+class TestHeaderPatterns:
+    @pytest.mark.parametrize("text, expected", [
+        ("Значение характеристики", True),
+        ("  ЗНАЧЕНИЕ  ", True),
+        ("Единица измерения", False),
+    ])
+    def test_value_header(self, text, expected):
+        assert _match_any_pattern(text, _VALUE_PATTERN) is expected
+
+
+class TestTableCells:
+    def test_same_as_python_docx_cells(self):
+        table = Document().add_table(rows=5, cols=4)
+        for i, row in enumerate(table.rows):
+            for j, cell in enumerate(row.cells):
+                cell.text = f" r{i}c{j} "
+        table.cell(1, 0).merge(table.cell(3, 0))  # вертикальное объединение
+        table.cell(0, 1).merge(table.cell(0, 3))  # горизонтальное
+        table.cell(2, 2).merge(table.cell(3, 3))  # блок
+        paragraph = table.cell(4, 3).paragraphs[0]
+        paragraph.add_run("a\tb").add_break()
+        paragraph.add_run("c")
+        table.cell(4, 3).add_paragraph("вторая строка")
+
+        expected = [[cell.text.strip() for cell in row.cells] for row in table.rows]
+        assert _table_cells(table._tbl) == expected
+
+    def test_nested_content_same_as_python_docx(self):
+        table = Document().add_table(rows=1, cols=1)
+        cell = table.cell(0, 0)
+        # Гиперссылка, разрывы, неразрывный дефис, а также вложенные runs
+        # (текстовое поле, правка), которые python-docx не читает
+        cell._tc.remove(cell._tc.find(qn("w:p")))
+        cell._tc.append(parse_xml(
+            f'<w:p {nsdecls("w", "wp", "a")}>'
+            '<w:r><w:t>24</w:t><w:noBreakHyphen/><w:t>48</w:t></w:r>'
+            '<w:hyperlink><w:r><w:t> порта</w:t></w:r></w:hyperlink>'
+            '<w:r><w:br w:type="page"/><w:ptab/><w:br/><w:t>PoE</w:t></w:r>'
+            '<w:ins><w:r><w:t>вставка</w:t></w:r></w:ins>'
+            '<w:r><w:drawing><wp:inline><a:graphic><a:graphicData>'
+            '<w:txbxContent><w:p><w:r><w:t>надпись</w:t></w:r></w:p></w:txbxContent>'
+            '</a:graphicData></a:graphic></wp:inline></w:drawing></w:r>'
+            '</w:p>'
+        ))
+
+        assert cell.text == "24-48 порта\t\nPoE"
+        assert _table_cells(table._tbl) == [[cell.text.strip()]]
+
+
+class TestParseTableRows:
+    COL_MAP = {"item_name": 0, "item_number": None, "char_name": 1, "value": 2, "unit": None, "header_rows": 1}
+
+    def test_canonical_key_lookup_is_case_insensitive(self, monkeypatch):
+        monkeypatch.setattr(table_parser, "get_variant_map", lambda: {"количество портов": "ports_count"})
+        rows = [
+            ["Наименование", "Наименование характеристики", "Значение"],
+            ["Коммутатор", "КОЛИЧЕСТВО Портов", "24"],
+            ["", "Тип Корпуса", "Металл"],
+        ]
+        parsed = _parse_table_rows(rows, self.COL_MAP)
+        assert [r["canonical_key"] for r in parsed] == ["ports_count", "тип_корпуса"]
+        assert parsed[1]["item_name"] == "Коммутатор"
+
+    def test_repeated_names_resolved_once(self, monkeypatch):
+        calls = []
+        real = table_parser._characteristic_key
+        monkeypatch.setattr(
+            table_parser, "_characteristic_key",
+            lambda name, variant_map: calls.append(name) or real(name, variant_map),
+        )
+        rows = [["Наименование", "Наименование характеристики", "Значение"]]
+        for item in ("Коммутатор 1", "Коммутатор 2"):
+            rows += [[item, "Порты", "24"], [item, "Характеристики", ""]]
+
+        parsed = _parse_table_rows(rows, self.COL_MAP)
+        assert [r["canonical_key"] for r in parsed] == ["порты", "порты"]
+        assert calls == ["Порты", "Характеристики"]
+
+
+class TestGroupRequirementsByItem:
+    def test_groups_by_number_prefix_then_name(self):
+        rows = [
+            {"item_number": "1.1", "item_name": "Коммутатор"},
+            {"item_number": "1.2", "item_name": "Коммутатор"},
+            {"item_number": "2.1", "item_name": "Маршрутизатор"},
+            {"item_number": "", "item_name": "ИБП"},
+            {"item_number": "", "item_name": ""},
+        ]
+        groups = _group_requirements_by_item(rows)
+        assert {key: len(group) for key, group in groups.items()} == {"1": 2, "2": 1, "ИБП": 1, "default": 1}
+
+
+class TestInferCategory:
+    @pytest.mark.parametrize("name, expected", [
+        ("Коммутатор доступа", "Коммутаторы"),
+        ("Ethernet Switch 24G", "Коммутаторы"),
+        ("Маршрутизатор сервисный", "Маршрутизаторы"),
+        ("Edge ROUTER", "Маршрутизаторы"),
+        ("Маршрутизатор с функциями коммутатора", "Коммутаторы"),
+        ("Точка доступа", None),
+    ])
+    def test_categories(self, name, expected):
+        assert _infer_category(name) == expected